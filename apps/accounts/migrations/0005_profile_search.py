@@ -0,0 +1,92 @@
+# Generated by Django 4.2.11 on 2026-10-17 04:19
+
+from django.db import migrations, models
+
+# Substring search over user_profile.search_text. PostgreSQL gets a trigram
+# GIN index that LIKE '%term%' can use; SQLite gets an FTS5 trigram table
+# kept in sync by triggers. SQLite drops those triggers when a later
+# migration rebuilds user_profile, so such a migration must recreate them.
+SEARCH_INDEX_SQL = {
+    'postgresql': (
+        [
+            'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+            'CREATE INDEX user_profile_search_trgm_idx ON user_profile USING gin (search_text gin_trgm_ops)',
+        ],
+        [
+            'DROP INDEX IF EXISTS user_profile_search_trgm_idx',
+        ],
+    ),
+    'sqlite': (
+        [
+            "CREATE VIRTUAL TABLE user_profile_search USING fts5("
+            "search_text, content='user_profile', content_rowid='id', tokenize='trigram')",
+            "CREATE TRIGGER user_profile_search_insert AFTER INSERT ON user_profile BEGIN "
+            "INSERT INTO user_profile_search(rowid, search_text) VALUES (new.id, new.search_text); END",
+            "CREATE TRIGGER user_profile_search_delete AFTER DELETE ON user_profile BEGIN "
+            "INSERT INTO user_profile_search(user_profile_search, rowid, search_text) "
+            "VALUES ('delete', old.id, old.search_text); END",
+            "CREATE TRIGGER user_profile_search_update AFTER UPDATE OF search_text ON user_profile BEGIN "
+            "INSERT INTO user_profile_search(user_profile_search, rowid, search_text) "
+            "VALUES ('delete', old.id, old.search_text); "
+            "INSERT INTO user_profile_search(rowid, search_text) VALUES (new.id, new.search_text); END",
+            "INSERT INTO user_profile_search(user_profile_search) VALUES ('rebuild')",
+        ],
+        [
+            'DROP TRIGGER IF EXISTS user_profile_search_insert',
+            'DROP TRIGGER IF EXISTS user_profile_search_delete',
+            'DROP TRIGGER IF EXISTS user_profile_search_update',
+            'DROP TABLE IF EXISTS user_profile_search',
+        ],
+    ),
+}
+
+
+def backfill_search_text(apps, schema_editor):
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    profiles = UserProfile.objects.select_related('user').order_by('id')
+    last_id = 0
+    while True:
+        chunk = list(profiles.filter(id__gt=last_id)[:1000])
+        if not chunk:
+            break
+        last_id = chunk[-1].id
+        for profile in chunk:
+            user = profile.user
+            parts = [user.username, user.email, user.first_name, user.last_name, profile.id_number or '']
+            profile.search_text = ' '.join(part for part in parts if part).lower()
+        UserProfile.objects.bulk_update(chunk, ['search_text'])
+
+
+def create_search_index(apps, schema_editor):
+    for sql in SEARCH_INDEX_SQL.get(schema_editor.connection.vendor, ([], []))[0]:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    for sql in SEARCH_INDEX_SQL.get(schema_editor.connection.vendor, ([], []))[1]:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_userprofile_id_number'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['-created_at', '-id'], name='user_profile_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['is_verified', '-created_at', '-id'], name='user_profile_verified_idx'),
+        ),
+    ]
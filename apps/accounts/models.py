@@ -20,14 +20,34 @@ class UserProfile(models.Model):
     verification_date = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Lowercased username, email, name and ID number for the admin user
+    # search; indexed by trigram GIN on PostgreSQL and FTS5 on SQLite
+    search_text = models.TextField(blank=True, default='', editable=False)
     
     class Meta:
         db_table = 'user_profile'
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pages of the admin user lists
+            models.Index(fields=['-created_at', '-id'], name='user_profile_created_idx'),
+            models.Index(fields=['is_verified', '-created_at', '-id'], name='user_profile_verified_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.get_full_name() or self.user.username}"
     
+    @staticmethod
+    def build_search_text(user, id_number):
+        parts = [user.username, user.email, user.first_name, user.last_name, id_number or '']
+        return ' '.join(part for part in parts if part).lower()
+    
+    def save(self, *args, **kwargs):
+        self.search_text = self.build_search_text(self.user, self.id_number)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'search_text'}
+        super().save(*args, **kwargs)
+    
     def get_priority_level(self):
         if self.citizen_type == 'senior':
             return 1
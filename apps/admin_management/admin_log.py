@@ -0,0 +1,65 @@
+"""
+Admin Log Buffer
+Collects AdminLog entries and writes a transaction's entries in one INSERT
+"""
+
+import threading
+import weakref
+
+from django.db import connection, transaction
+from apps.admin_management.models import AdminLog
+
+
+class _AdminLogBuffer:
+    """Entries made at one transaction/savepoint level, bulk-inserted on commit"""
+
+    def __init__(self):
+        self.entries = []
+        self.written = False
+
+    def __call__(self):
+        self.written = True
+        AdminLog.objects.bulk_create(self.entries)
+
+
+# This thread's (and so this connection's) pending buffers, keyed by the
+# savepoints open when each was started. Only the buffer's on_commit
+# callback holds it strongly, so when a rollback drops the callback the
+# buffer drops out of this map as well and its entries are never written.
+_pending = threading.local()
+
+
+def _current_buffer():
+    buffers = getattr(_pending, 'buffers', None)
+    if buffers is None:
+        buffers = _pending.buffers = weakref.WeakValueDictionary()
+
+    # Only reuse a buffer from the same level, so a rolled-back savepoint
+    # takes its entries with it
+    savepoint_ids = tuple(connection.savepoint_ids)
+    buffer = buffers.get(savepoint_ids)
+    if buffer is None or buffer.written:
+        buffer = buffers[savepoint_ids] = _AdminLogBuffer()
+        transaction.on_commit(buffer)
+    return buffer
+
+
+def log_admin_action(admin_user, action, description):
+    """
+    Record an admin action in the AdminLog
+
+    Inside a transaction the entry is buffered and written, together with
+    every other entry of that transaction, by one bulk INSERT after it
+    commits; nothing is logged if it rolls back. Outside a transaction
+    the entry is written immediately.
+
+    Args:
+        admin_user: Admin who performed the action
+        action: Short action name, e.g. 'Profile Approval'
+        description: What was done
+    """
+    entry = AdminLog(admin=admin_user, action=action, description=description)
+    if not connection.in_atomic_block:
+        entry.save()
+        return
+    _current_buffer().entries.append(entry)
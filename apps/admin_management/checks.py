@@ -0,0 +1,34 @@
+"""
+System Checks
+Database checks for the admin tools
+"""
+
+from django.core.checks import Tags, Warning, register
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+from apps.admin_management.user_search import missing_sqlite_search_objects
+
+
+@register(Tags.database)
+def check_profile_search_index(app_configs, databases=None, **kwargs):
+    """Warn when the SQLite profile search table or its sync triggers are missing"""
+    warnings = []
+    for alias in databases or []:
+        db_connection = connections[alias]
+        if db_connection.vendor != 'sqlite':
+            continue
+        # Nothing to check before the migration that creates them has run
+        applied = MigrationRecorder(db_connection).applied_migrations()
+        if ('accounts', '0005_profile_search') not in applied:
+            continue
+        missing = missing_sqlite_search_objects(db_connection)
+        if missing:
+            warnings.append(Warning(
+                f"Profile search objects missing from database '{alias}': {', '.join(missing)}",
+                hint=(
+                    'User search falls back to slow LIKE scans. Recreate them with the SQL '
+                    'in accounts migration 0005_profile_search and rebuild user_profile_search.'
+                ),
+                id='admin_management.W001',
+            ))
+    return warnings
@@ -0,0 +1,81 @@
+"""
+Dashboard Metrics
+Cached counters for the admin landing page
+"""
+
+import logging
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from apps.accounts.models import UserProfile
+from apps.appointments.models import Appointment
+from apps.queues.models import Queue
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_METRICS_CACHE_KEY = 'admin_dashboard_metrics'
+DASHBOARD_METRICS_CACHE_SECONDS = 10
+
+EMPTY_DASHBOARD_METRICS = {
+    'pending_verifications': 0,
+    'pending_appointments': 0,
+    'total_users': 0,
+    'today_queues': 0,
+    'active_walkin_queues': 0,
+}
+
+
+def _compute_dashboard_metrics():
+    """One aggregate query per table: profiles, appointments and queues"""
+    profiles = UserProfile.objects.aggregate(
+        total_users=Count('id'),
+        pending_verifications=Count('id', filter=Q(is_verified=False)),
+    )
+    pending_appointments = Appointment.objects.filter(status='pending').count()
+    queues = Queue.objects.active().aggregate(
+        today_queues=Count('id', filter=Q(is_walkin=False)),
+        active_walkin_queues=Count('id', filter=Q(is_walkin=True)),
+    )
+    
+    return {
+        'pending_verifications': profiles['pending_verifications'],
+        'pending_appointments': pending_appointments,
+        'total_users': profiles['total_users'],
+        'today_queues': queues['today_queues'],
+        'active_walkin_queues': queues['active_walkin_queues'],
+    }
+
+
+def get_dashboard_metrics():
+    """
+    Get the admin dashboard counters
+    
+    Served from cache for a few seconds. Signals on the counted models drop
+    the cached copy in this process; the short timeout bounds how stale
+    other worker processes can be.
+    
+    Returns:
+        dict: {
+            'pending_verifications': int,
+            'pending_appointments': int,
+            'total_users': int,
+            'today_queues': int,
+            'active_walkin_queues': int
+        }
+    """
+    metrics = cache.get(DASHBOARD_METRICS_CACHE_KEY)
+    if metrics is not None:
+        return metrics
+    
+    try:
+        metrics = _compute_dashboard_metrics()
+    except Exception as e:
+        logger.error(f'Error computing dashboard metrics: {str(e)}')
+        return dict(EMPTY_DASHBOARD_METRICS)
+    
+    cache.set(DASHBOARD_METRICS_CACHE_KEY, metrics, DASHBOARD_METRICS_CACHE_SECONDS)
+    return metrics
+
+
+def invalidate_dashboard_metrics():
+    cache.delete(DASHBOARD_METRICS_CACHE_KEY)
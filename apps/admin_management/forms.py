@@ -65,3 +65,43 @@ class AdminCreationForm(forms.ModelForm):
         if commit:
             user.save()
         return user
+
+class AdminLogFilterForm(forms.Form):
+    admin = forms.ModelChoiceField(
+        queryset=User.objects.filter(is_staff=True).order_by('username'),
+        required=False,
+        empty_label='All admins',
+        widget=forms.Select(attrs={'class': 'form-select form-select-sm'})
+    )
+    action = forms.CharField(
+        required=False,
+        max_length=200,
+        widget=forms.TextInput(attrs={'class': 'form-control form-control-sm', 'placeholder': 'Action', 'list': 'logActions'})
+    )
+    date_from = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={'class': 'form-control form-control-sm', 'type': 'date'})
+    )
+    date_to = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={'class': 'form-control form-control-sm', 'type': 'date'})
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from = cleaned_data.get('date_from')
+        date_to = cleaned_data.get('date_to')
+        if date_from and date_to and date_from > date_to:
+            raise forms.ValidationError('The start date must be on or before the end date.')
+        return cleaned_data
+
+class UserSearchForm(forms.Form):
+    q = forms.CharField(
+        required=False,
+        max_length=100,
+        widget=forms.TextInput(attrs={
+            'class': 'form-control form-control-sm',
+            'placeholder': 'Username, email, name or ID number',
+            'type': 'search',
+        })
+    )
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.11 on 2026-10-17 04:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_management', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='adminlog',
+            index=models.Index(fields=['-timestamp', '-id'], name='admin_log_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='adminlog',
+            index=models.Index(fields=['admin', '-timestamp', '-id'], name='admin_log_admin_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='adminlog',
+            index=models.Index(fields=['action', '-timestamp', '-id'], name='admin_log_action_time_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.11 on 2026-10-17 04:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_management', '0002_admin_log_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VerificationStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_users', models.IntegerField(default=0)),
+                ('active_users', models.IntegerField(default=0)),
+                ('email_verified_users', models.IntegerField(default=0)),
+                ('total_profiles', models.IntegerField(default=0)),
+                ('verified_profiles', models.IntegerField(default=0)),
+                ('pending_requests', models.IntegerField(default=0)),
+                ('approved_requests', models.IntegerField(default=0)),
+                ('rejected_requests', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'verification_stats',
+            },
+        ),
+    ]
@@ -33,6 +33,31 @@ class AdminLog(models.Model):
     class Meta:
         db_table = 'admin_log'
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['-timestamp', '-id'], name='admin_log_timestamp_idx'),
+            models.Index(fields=['admin', '-timestamp', '-id'], name='admin_log_admin_time_idx'),
+            models.Index(fields=['action', '-timestamp', '-id'], name='admin_log_action_time_idx'),
+        ]
     
     def __str__(self):
         return f"{self.admin.username} - {self.action}"
+
+class VerificationStats(models.Model):
+    """Single-row user and verification counters, adjusted by signals on each change"""
+    # Plain integers: a counter that has drifted below zero is clamped when
+    # read and fixed by recompute_stats instead of failing the save
+    total_users = models.IntegerField(default=0)
+    active_users = models.IntegerField(default=0)
+    email_verified_users = models.IntegerField(default=0)
+    total_profiles = models.IntegerField(default=0)
+    verified_profiles = models.IntegerField(default=0)
+    pending_requests = models.IntegerField(default=0)
+    approved_requests = models.IntegerField(default=0)
+    rejected_requests = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'verification_stats'
+    
+    def __str__(self):
+        return f"{self.verified_profiles}/{self.total_profiles} profiles verified"
@@ -4,9 +4,21 @@ Functions to handle user profile verification
 """
 
 from django.utils import timezone
+from django.db import transaction
 from django.contrib.auth.models import User
 from apps.accounts.models import UserProfile
-from apps.admin_management.models import VerificationRequest, AdminLog
+from apps.admin_management.models import VerificationRequest
+from apps.admin_management.admin_log import log_admin_action
+from apps.admin_management.dashboard_metrics import invalidate_dashboard_metrics
+from apps.admin_management.user_verification import unique_user_ids
+from apps.admin_management.verification_stats import (
+    adjust_verification_stats,
+    get_verification_counters,
+    request_status_deltas,
+)
+
+# Pending requests approved per transaction by approve_all_pending_verifications
+APPROVAL_CHUNK_SIZE = 500
 
 
 def approve_user_profile(user_id, admin_user, comments=""):
@@ -54,8 +66,8 @@ def approve_user_profile(user_id, admin_user, comments=""):
             )
         
         # Log the action
-        AdminLog.objects.create(
-            admin=admin_user,
+        log_admin_action(
+            admin_user=admin_user,
             action='Profile Approval',
             description=f"Approved profile for user: {user.get_full_name()} ({user.email})"
         )
@@ -121,8 +133,8 @@ def reject_user_profile(user_id, admin_user, comments=""):
             )
         
         # Log the action
-        AdminLog.objects.create(
-            admin=admin_user,
+        log_admin_action(
+            admin_user=admin_user,
             action='Profile Rejection',
             description=f"Rejected profile for user: {user.get_full_name()} ({user.email}) - Reason: {comments}"
         )
@@ -238,6 +250,9 @@ def get_verification_stats():
     """
     Get verification statistics
     
+    Read from the materialized counters row, so the cost does not grow
+    with the number of users.
+    
     Returns:
         dict: {
             'total_users': int,
@@ -250,23 +265,20 @@ def get_verification_stats():
         }
     """
     try:
-        all_users = UserProfile.objects.count()
-        verified_users = UserProfile.objects.filter(is_verified=True).count()
+        stats = get_verification_counters()
+        all_users = stats.total_profiles
+        verified_users = stats.verified_profiles
         unverified_users = all_users - verified_users
         
-        pending_requests = VerificationRequest.objects.filter(status='pending').count()
-        approved_requests = VerificationRequest.objects.filter(status='approved').count()
-        rejected_requests = VerificationRequest.objects.filter(status='rejected').count()
-        
         verification_rate = (verified_users / all_users * 100) if all_users > 0 else 0
         
         return {
             'total_users': all_users,
             'verified_users': verified_users,
             'unverified_users': unverified_users,
-            'pending_requests': pending_requests,
-            'approved_requests': approved_requests,
-            'rejected_requests': rejected_requests,
+            'pending_requests': stats.pending_requests,
+            'approved_requests': stats.approved_requests,
+            'rejected_requests': stats.rejected_requests,
             'verification_rate': round(verification_rate, 2)
         }
     except Exception as e:
@@ -280,6 +292,11 @@ def bulk_approve_profiles(user_ids, admin_user, comments=""):
     """
     Approve multiple user profiles at once
     
+    All users are loaded with their profiles and verification requests in
+    one query, validated in memory and written with one UPDATE per table,
+    one bulk INSERT for missing verification requests and one for the log
+    entries, so the query count does not depend on how many ids are given.
+    
     Args:
         user_ids: List of user IDs
         admin_user: Admin user approving
@@ -293,15 +310,85 @@ def bulk_approve_profiles(user_ids, admin_user, comments=""):
             'results': list of results for each user
         }
     """
+    # A user listed twice is approved and reported once
+    user_ids = unique_user_ids(user_ids)
     results = []
-    approved_count = 0
+    approved = {}
     
-    for user_id in user_ids:
-        result = approve_user_profile(user_id, admin_user, comments)
-        results.append(result)
-        if result['success']:
-            approved_count += 1
+    try:
+        with transaction.atomic():
+            users = User.objects.select_related('profile', 'verification_request').in_bulk(
+                [int(user_id) for user_id in user_ids if str(user_id).isdigit()]
+            )
+            
+            for user_id in user_ids:
+                user = users.get(int(user_id)) if str(user_id).isdigit() else None
+                if user is None:
+                    results.append({
+                        'success': False,
+                        'message': f'User with ID {user_id} not found'
+                    })
+                elif not hasattr(user, 'profile'):
+                    results.append({
+                        'success': False,
+                        'message': f'Error approving profile: {user.get_full_name() or user.username} has no profile'
+                    })
+                else:
+                    approved[user.id] = user
+                    results.append({
+                        'success': True,
+                        'message': f'Profile for {user.get_full_name()} has been verified',
+                        'user': user,
+                        'profile': user.profile
+                    })
+            
+            if approved:
+                # Read before bulk_create, which fills in user.verification_request
+                # for users that had none
+                old_statuses = [
+                    user.verification_request.status if hasattr(user, 'verification_request') else None
+                    for user in approved.values()
+                ]
+                newly_verified = sum(not user.profile.is_verified for user in approved.values())
+                
+                now = timezone.now()
+                UserProfile.objects.filter(user_id__in=approved).update(
+                    is_verified=True, verification_date=now, updated_at=now
+                )
+                VerificationRequest.objects.filter(user_id__in=approved).update(
+                    status='approved', reviewed_by=admin_user, reviewed_at=now, comments=comments
+                )
+                VerificationRequest.objects.bulk_create([
+                    VerificationRequest(
+                        user=user,
+                        status='approved',
+                        reviewed_by=admin_user,
+                        reviewed_at=now,
+                        comments=comments
+                    )
+                    for user in approved.values() if not hasattr(user, 'verification_request')
+                ])
+                # update() and bulk_create() skip the model signals
+                invalidate_dashboard_metrics()
+                deltas = request_status_deltas(old_statuses, 'approved')
+                deltas['verified_profiles'] = newly_verified
+                adjust_verification_stats(deltas)
+                
+                for user in approved.values():
+                    user.profile.is_verified = True
+                    user.profile.verification_date = now
+                    log_admin_action(
+                        admin_user=admin_user,
+                        action='Profile Approval',
+                        description=f"Approved profile for user: {user.get_full_name()} ({user.email})"
+                    )
+    except Exception as e:
+        results = [{
+            'success': False,
+            'message': f'Error approving profile: {str(e)}'
+        } for _ in user_ids]
     
+    approved_count = sum(1 for result in results if result['success'])
     return {
         'total_processed': len(user_ids),
         'approved_count': approved_count,
@@ -375,66 +462,112 @@ def can_approve_profile(user_id):
         }
 
 
-def approve_all_pending_verifications(admin_user, comments="Auto-approved by admin"):
+def approve_all_pending_verifications(admin_user, comments="Auto-approved by admin", chunk_size=APPROVAL_CHUNK_SIZE):
     """
     Approve all pending verification requests
     
+    Works through the backlog in chunks of `chunk_size` requests. Each
+    chunk is one transaction: a single read of the requests with their
+    users and profiles, one UPDATE of the profiles, one UPDATE of the
+    requests and one bulk INSERT of the log entries. Requests whose user
+    has no profile are reported as failed and left pending.
+    
     Args:
         admin_user: Admin user approving
         comments: Comments for approval
+        chunk_size: Requests approved per transaction
         
     Returns:
         dict: {
+            'success': bool,
             'total_approved': int,
             'failed': int,
+            'total_processed': int,
             'results': list of results,
             'message': str
         }
+        On an error the totals cover the chunks committed before it.
     """
+    pending_verifications = VerificationRequest.objects.filter(
+        status='pending'
+    ).select_related('user__profile').order_by('id')
+    results = []
+    # Totals of committed chunks only, so a failure part way reports them
+    approved_count = 0
+    total = 0
+    last_id = 0
+    
     try:
-        pending_verifications = VerificationRequest.objects.filter(status='pending')
-        total = pending_verifications.count()
-        results = []
-        approved_count = 0
-        
-        for verification in pending_verifications:
-            try:
-                user = verification.user
-                profile = user.profile
-                
-                # Update profile
-                profile.is_verified = True
-                profile.verification_date = timezone.now()
-                profile.save()
-                
-                # Update verification request
-                verification.status = 'approved'
-                verification.reviewed_by = admin_user
-                verification.reviewed_at = timezone.now()
-                verification.comments = comments
-                verification.save()
+        while True:
+            with transaction.atomic():
+                chunk = list(pending_verifications.filter(id__gt=last_id)[:chunk_size])
+                if not chunk:
+                    break
+                last_id = chunk[-1].id
+                chunk_results = []
                 
-                # Log the action
-                AdminLog.objects.create(
-                    admin=admin_user,
-                    action='Bulk Profile Approval',
-                    description=f"Auto-approved profile for user: {user.get_full_name()} ({user.email})"
-                )
+                approved = []
+                for verification in chunk:
+                    user = verification.user
+                    if hasattr(user, 'profile'):
+                        approved.append(verification)
+                    else:
+                        chunk_results.append({
+                            'success': False,
+                            'user': user.get_full_name(),
+                            'message': 'Error: User has no profile'
+                        })
                 
-                results.append({
-                    'success': True,
-                    'user': user.get_full_name(),
-                    'message': f'Approved {user.get_full_name()}'
-                })
-                approved_count += 1
-            except Exception as e:
-                results.append({
-                    'success': False,
-                    'user': verification.user.get_full_name(),
-                    'message': f'Error: {str(e)}'
-                })
+                if approved:
+                    now = timezone.now()
+                    # Only requests still pending: another admin may have
+                    # reviewed some since the chunk was read
+                    approved_ids = [verification.id for verification in approved]
+                    updated = VerificationRequest.objects.filter(id__in=approved_ids, status='pending').update(
+                        status='approved', reviewed_by=admin_user, reviewed_at=now, comments=comments
+                    )
+                    if updated != len(approved):
+                        ours = set(VerificationRequest.objects.filter(
+                            id__in=approved_ids, status='approved', reviewed_by=admin_user, reviewed_at=now
+                        ).values_list('id', flat=True))
+                        for verification in approved:
+                            if verification.id not in ours:
+                                chunk_results.append({
+                                    'success': False,
+                                    'user': verification.user.get_full_name(),
+                                    'message': 'Error: Request was already reviewed'
+                                })
+                        approved = [verification for verification in approved if verification.id in ours]
+                    
+                    newly_verified = UserProfile.objects.filter(
+                        id__in=[verification.user.profile.id for verification in approved],
+                        is_verified=False
+                    ).update(is_verified=True, verification_date=now, updated_at=now)
+                    # update() skips the UserProfile and VerificationRequest signals
+                    invalidate_dashboard_metrics()
+                    deltas = request_status_deltas(['pending'] * updated, 'approved')
+                    deltas['verified_profiles'] = newly_verified
+                    adjust_verification_stats(deltas)
+                    
+                    for verification in approved:
+                        user = verification.user
+                        log_admin_action(
+                            admin_user=admin_user,
+                            action='Bulk Profile Approval',
+                            description=f"Auto-approved profile for user: {user.get_full_name()} ({user.email})"
+                        )
+                        chunk_results.append({
+                            'success': True,
+                            'user': user.get_full_name(),
+                            'message': f'Approved {user.get_full_name()}'
+                        })
+            
+            results.extend(chunk_results)
+            approved_count += len(approved)
+            total += len(chunk)
         
         return {
+            'success': True,
             'total_approved': approved_count,
             'failed': total - approved_count,
             'total_processed': total,
@@ -443,9 +576,12 @@ def approve_all_pending_verifications(admin_user, comments="Auto-approved by adm
         }
     except Exception as e:
         return {
-            'total_approved': 0,
-            'failed': 0,
-            'message': f'Error approving pending verifications: {str(e)}'
+            'success': False,
+            'total_approved': approved_count,
+            'failed': total - approved_count,
+            'total_processed': total,
+            'results': results,
+            'message': f'Error approving pending verifications after {approved_count} approvals: {str(e)}'
         }
 
 
@@ -483,8 +619,8 @@ def approve_pending_verification_by_id(verification_id, admin_user, comments="")
         verification.save()
         
         # Log the action
-        AdminLog.objects.create(
-            admin=admin_user,
+        log_admin_action(
+            admin_user=admin_user,
             action='Profile Approval',
             description=f"Approved profile for user: {user.get_full_name()} ({user.email})"
         )
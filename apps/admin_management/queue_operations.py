@@ -0,0 +1,153 @@
+"""
+Queue Operations
+Bulk status changes for counter staff
+"""
+
+import logging
+
+from django.db import transaction
+from apps.queues.models import Queue, Service
+from apps.queues.utils import serve_next_queues, cancel_queues, complete_queues, lock_queues
+from apps.admin_management.admin_log import log_admin_action
+from apps.admin_management.dashboard_metrics import invalidate_dashboard_metrics
+
+logger = logging.getLogger(__name__)
+
+BULK_QUEUE_ACTIONS = {
+    'serve_next': 'Served',
+    'cancel': 'Cancelled',
+    'complete': 'Completed',
+}
+
+# Largest batch accepted by one request
+BULK_QUEUE_LIMIT = 500
+
+# Queue numbers listed in the log entry before it is summarized
+LOGGED_QUEUE_NUMBERS = 20
+
+
+def _log_bulk_queue_action(admin_user, action, queue_numbers, skipped_count):
+    listed = ', '.join(queue_numbers[:LOGGED_QUEUE_NUMBERS])
+    if len(queue_numbers) > LOGGED_QUEUE_NUMBERS:
+        listed += f" and {len(queue_numbers) - LOGGED_QUEUE_NUMBERS} more"
+    description = f"{BULK_QUEUE_ACTIONS[action]} {len(queue_numbers)} queue(s): {listed}"
+    if skipped_count:
+        description += f". Skipped {skipped_count} no longer active"
+    log_admin_action(
+        admin_user=admin_user,
+        action='Queue Management',
+        description=description
+    )
+
+
+def bulk_update_queue_status(admin_user, action, queue_ids=None, service_id=None, count=None):
+    """
+    Apply one status change to many tickets in a single transaction
+
+    'serve_next' moves the next `count` waiting tickets of a service to
+    serving; 'cancel' and 'complete' act on the selected `queue_ids`. The
+    selection is loaded once under a row lock, so tickets another counter
+    finished meanwhile are skipped rather than reported, and one AdminLog
+    entry records the whole batch.
+
+    Args:
+        admin_user: Admin performing the change
+        action: 'serve_next', 'cancel' or 'complete'
+        queue_ids: Selected queue IDs (cancel/complete)
+        service_id: Service to serve from (serve_next)
+        count: How many tickets to serve (serve_next)
+
+    Returns:
+        dict: {
+            'success': bool,
+            'message': str,
+            'updated_count': int,
+            'skipped_count': int
+        }
+    """
+    if action not in BULK_QUEUE_ACTIONS:
+        return {
+            'success': False,
+            'message': f"Invalid action. Valid options: {', '.join(BULK_QUEUE_ACTIONS)}",
+            'updated_count': 0,
+            'skipped_count': 0
+        }
+
+    try:
+        with transaction.atomic():
+            if action == 'serve_next':
+                try:
+                    count = int(count)
+                    service = Service.objects.get(id=service_id, is_active=True)
+                except (TypeError, ValueError, Service.DoesNotExist):
+                    return {
+                        'success': False,
+                        'message': 'Please select an active service and how many to serve.',
+                        'updated_count': 0,
+                        'skipped_count': 0
+                    }
+                if not 1 <= count <= BULK_QUEUE_LIMIT:
+                    return {
+                        'success': False,
+                        'message': f'You can serve between 1 and {BULK_QUEUE_LIMIT} tickets at a time.',
+                        'updated_count': 0,
+                        'skipped_count': 0
+                    }
+                served_ids = serve_next_queues(service, count)
+                queue_numbers = list(
+                    Queue.objects.filter(id__in=served_ids)
+                    .order_by('priority_level', 'created_at', 'id')
+                    .values_list('queue_number', flat=True)
+                )
+                updated_count = len(served_ids)
+                skipped_count = 0
+            else:
+                try:
+                    queue_ids = {int(queue_id) for queue_id in queue_ids or []}
+                except (TypeError, ValueError):
+                    queue_ids = set()
+                if not queue_ids or len(queue_ids) > BULK_QUEUE_LIMIT:
+                    return {
+                        'success': False,
+                        'message': f'Please select between 1 and {BULK_QUEUE_LIMIT} queues.',
+                        'updated_count': 0,
+                        'skipped_count': 0
+                    }
+
+                # Locked until the change commits, so the numbers logged and
+                # reported are the tickets actually changed
+                queues = list(lock_queues(Queue.objects.active().filter(id__in=queue_ids)).order_by('id'))
+                if action == 'cancel':
+                    updated_count = cancel_queues([queue.id for queue in queues])
+                else:
+                    updated_count = complete_queues(queues)
+                queue_numbers = [queue.queue_number for queue in queues]
+                skipped_count = len(queue_ids) - updated_count
+
+            if queue_numbers:
+                # update() skips the Queue signals that refresh the dashboard
+                invalidate_dashboard_metrics()
+                _log_bulk_queue_action(admin_user, action, queue_numbers, skipped_count)
+
+        if not queue_numbers:
+            return {
+                'success': False,
+                'message': 'No active queues matched the selection.',
+                'updated_count': 0,
+                'skipped_count': skipped_count
+            }
+        return {
+            'success': True,
+            'message': f"{BULK_QUEUE_ACTIONS[action]} {updated_count} queue(s)"
+                       + (f", skipped {skipped_count} no longer active" if skipped_count else ""),
+            'updated_count': updated_count,
+            'skipped_count': skipped_count
+        }
+    except Exception as e:
+        logger.error(f'Error applying bulk queue action {action}: {str(e)}')
+        return {
+            'success': False,
+            'message': f'Error updating queues: {str(e)}',
+            'updated_count': 0,
+            'skipped_count': 0
+        }
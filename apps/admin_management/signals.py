@@ -0,0 +1,80 @@
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from apps.accounts.models import UserProfile
+from apps.appointments.models import Appointment
+from apps.queues.models import Queue
+from .dashboard_metrics import invalidate_dashboard_metrics
+from .models import VerificationRequest
+from .verification_stats import TRACKED_FIELDS, adjust_verification_stats, counter_contribution
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_save, sender=Appointment)
+@receiver(post_delete, sender=Appointment)
+@receiver(post_save, sender=Queue)
+@receiver(post_delete, sender=Queue)
+def refresh_dashboard_metrics(sender, **kwargs):
+    invalidate_dashboard_metrics()
+
+# UserProfile.search_text copies these User fields
+USER_SEARCH_FIELDS = {'username', 'email', 'first_name', 'last_name'}
+
+@receiver(post_save, sender=User)
+def refresh_profile_search_text(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and not USER_SEARCH_FIELDS & update_fields):
+        return
+    profile = UserProfile.objects.filter(user=instance).only('id', 'id_number', 'search_text').first()
+    if profile is None:
+        return
+    search_text = UserProfile.build_search_text(instance, profile.id_number)
+    if search_text != profile.search_text:
+        UserProfile.objects.filter(pk=profile.pk).update(search_text=search_text)
+
+# Verification counters change by the difference between what a row
+# contributed before a save or delete and what it contributes after. The
+# before side is read from the database, not from the loaded instance: a
+# stale instance would count a change someone else already counted.
+
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=UserProfile)
+@receiver(pre_save, sender=VerificationRequest)
+@receiver(pre_delete, sender=User)
+@receiver(pre_delete, sender=UserProfile)
+@receiver(pre_delete, sender=VerificationRequest)
+def load_counter_contribution(sender, instance, update_fields=None, **kwargs):
+    instance.__dict__.pop('_counter_contribution', None)
+    if update_fields is not None and not set(TRACKED_FIELDS[sender]) & set(update_fields):
+        # e.g. the last_login write on every login: no counter can change
+        return
+    if instance._state.adding:
+        instance._counter_contribution = Counter()
+        return
+    stored = sender.objects.filter(pk=instance.pk).only(*TRACKED_FIELDS[sender])
+    if connection.in_atomic_block:
+        # Concurrent changes to this row wait for ours to commit and then
+        # read our result; deletes always run in a transaction
+        stored = stored.select_for_update()
+    stored = stored.first()
+    instance._counter_contribution = counter_contribution(stored) if stored else Counter()
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_save, sender=VerificationRequest)
+def count_saved_row(sender, instance, **kwargs):
+    before = instance.__dict__.pop('_counter_contribution', None)
+    if before is None:
+        return
+    deltas = counter_contribution(instance)
+    deltas.subtract(before)
+    adjust_verification_stats(deltas)
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_delete, sender=VerificationRequest)
+def count_deleted_row(sender, instance, **kwargs):
+    before = instance.__dict__.pop('_counter_contribution', Counter())
+    adjust_verification_stats({field: -count for field, count in before.items()})
@@ -4,8 +4,9 @@ Functions to verify and validate different status types in the system
 """
 
 from django.contrib.auth.models import User
+from django.db.models import Count
 from apps.accounts.models import UserProfile
-from apps.queues.models import Queue
+from apps.queues.models import Queue, QueueHistory
 from apps.appointments.models import Appointment
 
 
@@ -189,6 +190,68 @@ def verify_verification_status(status):
     }
 
 
+QUEUE_STATUSES = ('waiting', 'serving', 'completed', 'cancelled')
+APPOINTMENT_STATUSES = ('pending', 'approved', 'rejected', 'completed', 'cancelled')
+
+
+def _grouped_status_counts(querysets, user_ids, statuses):
+    """
+    Per-user status counts from one GROUP BY (user, status) query
+    
+    Several querysets (live and archived queue tickets) are combined with
+    UNION ALL so they still cost a single round trip.
+    
+    Returns:
+        dict: {user_id: {'total': int, <status>: int, ...}}
+    """
+    counts = {user_id: dict.fromkeys(('total',) + statuses, 0) for user_id in user_ids}
+    grouped = [
+        queryset.filter(user_id__in=user_ids)
+        .values_list('user_id', 'status')
+        .annotate(count=Count('id'))
+        .order_by()
+        for queryset in querysets
+    ]
+    rows = grouped[0].union(*grouped[1:], all=True) if len(grouped) > 1 else grouped[0]
+    
+    for user_id, status, count in rows:
+        user_counts = counts[user_id]
+        user_counts['total'] += count
+        if status in user_counts:
+            user_counts[status] += count
+    return counts
+
+
+def get_user_status_matrix(user_ids):
+    """
+    Queue and appointment status counts for many users in two grouped queries
+    
+    Args:
+        user_ids: User IDs
+        
+    Returns:
+        dict: {user_id: {'queue_statuses': dict, 'appointment_statuses': dict}}
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return {}
+    
+    # Completed tickets are archived, so queues also count queue_history
+    queue_counts = _grouped_status_counts(
+        [Queue.objects.all(), QueueHistory.objects.all()], user_ids, QUEUE_STATUSES
+    )
+    appointment_counts = _grouped_status_counts(
+        [Appointment.objects.all()], user_ids, APPOINTMENT_STATUSES
+    )
+    return {
+        user_id: {
+            'queue_statuses': queue_counts[user_id],
+            'appointment_statuses': appointment_counts[user_id],
+        }
+        for user_id in user_ids
+    }
+
+
 def verify_all_user_statuses(user_id):
     """
     Get comprehensive status verification for a user
@@ -200,36 +263,16 @@ def verify_all_user_statuses(user_id):
         dict: Contains all status information for the user
     """
     try:
-        user = User.objects.get(id=user_id)
+        user = User.objects.select_related('verification_request').get(id=user_id)
         
         verification = verify_user_verification_status(user)
-        
-        # Get user queues
-        queues = Queue.objects.filter(user=user)
-        queue_statuses = {
-            'total': queues.count(),
-            'waiting': queues.filter(status='waiting').count(),
-            'serving': queues.filter(status='serving').count(),
-            'completed': queues.filter(status='completed').count(),
-            'cancelled': queues.filter(status='cancelled').count(),
-        }
-        
-        # Get user appointments
-        appointments = Appointment.objects.filter(user=user)
-        appointment_statuses = {
-            'total': appointments.count(),
-            'pending': appointments.filter(status='pending').count(),
-            'approved': appointments.filter(status='approved').count(),
-            'rejected': appointments.filter(status='rejected').count(),
-            'completed': appointments.filter(status='completed').count(),
-            'cancelled': appointments.filter(status='cancelled').count(),
-        }
+        statuses = get_user_status_matrix([user.id])[user.id]
         
         return {
             'user': user,
             'verification': verification,
-            'queue_statuses': queue_statuses,
-            'appointment_statuses': appointment_statuses,
+            'queue_statuses': statuses['queue_statuses'],
+            'appointment_statuses': statuses['appointment_statuses'],
             'message': f"Status verification completed for user {user.username}"
         }
     except User.DoesNotExist:
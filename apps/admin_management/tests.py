@@ -1,4 +1,819 @@
-from django.test import TestCase
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+import json
+import threading
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.signals import request_finished
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.forms.models import model_to_dict
+from django.test import Client, RequestFactory, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import UserProfile
+from apps.appointments.models import Appointment
+from apps.queues.models import Queue, QueueHistory
+from apps.queues.tests import create_service
+from apps.queues.utils import mark_queue_changed
+from .models import AdminLog, VerificationRequest, VerificationStats
+from .profile_verification import approve_all_pending_verifications, bulk_approve_profiles, get_verification_stats
+from .user_verification import bulk_verify_users, get_user_verification_stats
+from .verification_stats import adjust_verification_stats, recompute_verification_stats
+from .status_utils import get_user_status_matrix, verify_all_user_statuses
+from .admin_log import log_admin_action
+from .dashboard_metrics import get_dashboard_metrics
+from .checks import check_profile_search_index
+from . import profile_verification, user_verification, views
+
+
+def create_admin(username='admin'):
+    return User.objects.create_superuser(username, f'{username}@example.com', 'Admin@12345')
+
 
 class AdminManagementTestCase(TestCase):
     pass
+
+
+class DashboardMetricsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = create_admin()
+        self.service = create_service()
+        for index in range(5):
+            user = User.objects.create(username=f'citizen{index}')
+            UserProfile.objects.create(user=user, is_verified=index < 2)
+            Appointment.objects.create(user=user, appointment_date='2026-01-01T09:00Z', service_type='birth', purpose='Test')
+            Queue.objects.create(user=user, service=self.service, queue_number=f'BIRTH-{index}')
+            Queue.objects.create(user=user, service=self.service, queue_number=f'W-{index:03d}', is_walkin=True)
+
+    def test_metrics_values(self):
+        self.assertEqual(get_dashboard_metrics(), {
+            'pending_verifications': 3,
+            'pending_appointments': 5,
+            'total_users': 5,
+            'today_queues': 5,
+            'active_walkin_queues': 5,
+        })
+
+    def test_metrics_query_budget(self):
+        # One aggregate per table, then nothing while cached
+        with self.assertNumQueries(3):
+            get_dashboard_metrics()
+        with self.assertNumQueries(0):
+            get_dashboard_metrics()
+
+    def test_metrics_invalidated_on_change(self):
+        get_dashboard_metrics()
+        Appointment.objects.filter(status='pending').first().delete()
+        self.assertEqual(get_dashboard_metrics()['pending_appointments'], 4)
+
+    def test_dashboard_view_query_budget(self):
+        self.client.force_login(self.admin)
+        # Session and user lookups plus the three metrics aggregates
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('admin_management:dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['pending_verifications'], 3)
+
+
+class BulkQueueStatusTestCase(TestCase):
+    def setUp(self):
+        self.admin = create_admin()
+        self.client.force_login(self.admin)
+        self.service = create_service()
+        self.queues = []
+        for index in range(30):
+            user = User.objects.create(username=f'citizen{index}')
+            self.queues.append(Queue.objects.create(
+                user=user,
+                service=self.service,
+                queue_number=f'BIRTH-{index:04d}',
+                priority_level=1 if index >= 25 else 3,
+            ))
+
+    def bulk_update(self, **data):
+        # Admin log entries are written when the transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('admin_management:bulk_update_queue_status'), data)
+
+    def test_serve_next_follows_queue_order(self):
+        self.bulk_update(action='serve_next', service_id=self.service.id, count=7)
+
+        serving = set(Queue.objects.filter(status='serving').values_list('queue_number', flat=True))
+        expected = {f'BIRTH-{index:04d}' for index in [25, 26, 27, 28, 29, 0, 1]}
+        self.assertEqual(serving, expected)
+        self.assertEqual(AdminLog.objects.filter(action='Queue Management').count(), 1)
+
+    def test_complete_and_cancel_selected(self):
+        selected = [queue.id for queue in self.queues[:10]]
+        self.bulk_update(action='complete', queue_ids=selected)
+        self.assertEqual(QueueHistory.objects.filter(status='completed').count(), 10)
+        self.assertFalse(Queue.objects.filter(id__in=selected).exists())
+
+        # Already-archived tickets are skipped, not failed
+        self.bulk_update(action='cancel', queue_ids=[queue.id for queue in self.queues[5:15]])
+        self.assertEqual(Queue.objects.filter(status='cancelled').count(), 5)
+
+        logs = list(AdminLog.objects.filter(action='Queue Management').values_list('description', flat=True))
+        self.assertEqual(len(logs), 2)
+        self.assertIn('Skipped 5', logs[0] + logs[1])
+
+    def test_bulk_changes_refresh_dashboard_metrics(self):
+        cache.clear()
+        self.assertEqual(get_dashboard_metrics()['today_queues'], 30)
+
+        self.bulk_update(action='cancel', queue_ids=[queue.id for queue in self.queues[:4]])
+        self.assertEqual(get_dashboard_metrics()['today_queues'], 26)
+
+    def test_query_count_does_not_grow_with_selection(self):
+        query_counts = []
+        for selected in (self.queues[:5], self.queues[5:30]):
+            with CaptureQueriesContext(connection) as queries:
+                self.bulk_update(action='cancel', queue_ids=[queue.id for queue in selected])
+            query_counts.append(len(queries))
+        self.assertEqual(query_counts[0], query_counts[1])
+        self.assertEqual(Queue.objects.filter(status='cancelled').count(), 30)
+
+
+class AdminLogBufferTestCase(TestCase):
+    def setUp(self):
+        self.admin = create_admin()
+
+    def test_entries_are_written_together_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                for index in range(25):
+                    log_admin_action(self.admin, 'Profile Approval', f'Approved user {index}')
+        self.assertEqual(AdminLog.objects.count(), 0)
+
+        with CaptureQueriesContext(connection) as queries:
+            for callback in callbacks:
+                callback()
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(AdminLog.objects.count(), 25)
+
+    def test_rolled_back_savepoint_logs_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                log_admin_action(self.admin, 'Profile Approval', 'Kept')
+                try:
+                    with transaction.atomic():
+                        log_admin_action(self.admin, 'Profile Approval', 'Rolled back')
+                        raise ValueError
+                except ValueError:
+                    pass
+        self.assertEqual(list(AdminLog.objects.values_list('description', flat=True)), ['Kept'])
+
+
+class AdminLogTransactionTestCase(TransactionTestCase):
+    def test_rolled_back_transaction_does_not_swallow_the_next(self):
+        admin = create_admin()
+        try:
+            with transaction.atomic():
+                log_admin_action(admin, 'Profile Approval', 'Rolled back')
+                raise ValueError
+        except ValueError:
+            pass
+
+        with transaction.atomic():
+            log_admin_action(admin, 'Profile Approval', 'Kept')
+
+        self.assertEqual(list(AdminLog.objects.values_list('description', flat=True)), ['Kept'])
+
+
+class ApproveAllPendingVerificationsTestCase(TestCase):
+    def setUp(self):
+        self.admin = create_admin()
+
+    def create_pending(self, count, with_profile=True):
+        for index in range(count):
+            user = User.objects.create(username=f'citizen{VerificationRequest.objects.count()}', first_name='Juan')
+            if with_profile:
+                UserProfile.objects.create(user=user)
+            VerificationRequest.objects.create(user=user, reason='Senior citizen ID')
+
+    def approve_all(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return approve_all_pending_verifications(self.admin, **kwargs)
+
+    def test_approves_in_set_based_chunks(self):
+        self.create_pending(25)
+        self.create_pending(2, with_profile=False)
+
+        result = self.approve_all(chunk_size=10)
+
+        self.assertEqual(result['total_approved'], 25)
+        self.assertEqual(result['failed'], 2)
+        self.assertEqual(len(result['results']), 27)
+        self.assertEqual(UserProfile.objects.filter(is_verified=True).count(), 25)
+        self.assertEqual(VerificationRequest.objects.filter(status='approved', reviewed_by=self.admin).count(), 25)
+        self.assertEqual(VerificationRequest.objects.filter(status='pending').count(), 2)
+        self.assertEqual(AdminLog.objects.filter(action='Bulk Profile Approval').count(), 25)
+
+    def test_requests_reviewed_meanwhile_are_left_alone(self):
+        self.create_pending(3)
+        rejected = VerificationRequest.objects.order_by('id').first()
+        recompute_verification_stats()
+        real_now = timezone.now
+
+        def reject_first_request():
+            # Another admin rejects a request after the chunk was read
+            VerificationRequest.objects.filter(id=rejected.id).update(status='rejected')
+            return real_now()
+
+        with mock.patch.object(profile_verification.timezone, 'now', side_effect=reject_first_request):
+            result = self.approve_all()
+
+        self.assertEqual((result['total_approved'], result['failed']), (2, 1))
+        self.assertEqual(VerificationRequest.objects.get(id=rejected.id).status, 'rejected')
+        self.assertFalse(UserProfile.objects.get(user=rejected.user).is_verified)
+        stats = VerificationStats.objects.get()
+        self.assertEqual((stats.approved_requests, stats.verified_profiles), (2, 2))
+
+    def test_failure_reports_committed_chunks(self):
+        self.create_pending(25)
+
+        with mock.patch.object(profile_verification, 'adjust_verification_stats', side_effect=[None, RuntimeError]):
+            result = self.approve_all(chunk_size=10)
+
+        self.assertFalse(result['success'])
+        self.assertEqual((result['total_approved'], result['total_processed']), (10, 10))
+        self.assertEqual(VerificationRequest.objects.filter(status='approved').count(), 10)
+
+    def test_query_count_does_not_grow_with_backlog(self):
+        query_counts = []
+        for backlog in (5, 40):
+            self.create_pending(backlog)
+            with CaptureQueriesContext(connection) as queries:
+                self.approve_all()
+            query_counts.append(len(queries))
+        self.assertEqual(query_counts[0], query_counts[1])
+
+
+class BulkVerificationTestCase(TestCase):
+    def setUp(self):
+        self.admin = create_admin()
+
+    def create_users(self, count):
+        user_ids = []
+        for index in range(count):
+            user = User.objects.create(username=f'citizen{User.objects.count()}', is_active=False)
+            UserProfile.objects.create(user=user)
+            if index % 2:
+                VerificationRequest.objects.create(user=user, reason='Senior citizen ID')
+            user_ids.append(user.id)
+        return user_ids
+
+    def test_bulk_approve_profiles(self):
+        user_ids = self.create_users(6)
+        bare_user = User.objects.create(username='no-profile')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = bulk_approve_profiles(user_ids + [bare_user.id, 999999], self.admin)
+
+        self.assertEqual((result['approved_count'], result['failed_count']), (6, 2))
+        self.assertEqual([item['success'] for item in result['results']], [True] * 6 + [False, False])
+        self.assertEqual(UserProfile.objects.filter(is_verified=True).count(), 6)
+        self.assertEqual(VerificationRequest.objects.filter(status='approved', reviewed_by=self.admin).count(), 6)
+        self.assertEqual(AdminLog.objects.filter(action='Profile Approval').count(), 6)
+
+    def test_bulk_verify_users(self):
+        user_ids = self.create_users(4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = bulk_verify_users(user_ids + ['abc'], self.admin, 'Walk-in check')
+
+        self.assertEqual((result['verified_count'], result['failed_count']), (4, 1))
+        self.assertEqual(User.objects.filter(id__in=user_ids, is_active=True).count(), 4)
+        self.assertEqual(UserProfile.objects.filter(is_verified=True).count(), 4)
+        self.assertEqual(AdminLog.objects.filter(action='User Verification').count(), 4)
+
+    def test_repeated_ids_are_handled_once(self):
+        user_ids = self.create_users(2)
+        repeated = [user_ids[0], str(user_ids[0]), user_ids[1], user_ids[0], 'abc', 'abc']
+
+        for bulk_function, count_key in ((bulk_approve_profiles, 'approved_count'), (bulk_verify_users, 'verified_count')):
+            with self.captureOnCommitCallbacks(execute=True):
+                result = bulk_function(repeated, self.admin)
+
+            self.assertEqual(result['total_processed'], 3, bulk_function.__name__)
+            self.assertEqual((result[count_key], result['failed_count']), (2, 1), bulk_function.__name__)
+            self.assertEqual(len(result['results']), 3, bulk_function.__name__)
+        self.assertEqual(AdminLog.objects.filter(action='Profile Approval').count(), 2)
+        self.assertEqual(AdminLog.objects.filter(action='User Verification').count(), 2)
+
+    def test_verify_counts_only_rows_it_changed(self):
+        user_ids = self.create_users(3)
+        recompute_verification_stats()
+        real_now = timezone.now
+        interleaved = []
+
+        def verify_first_user_elsewhere():
+            # Another admin verifies a user after this call read them
+            if not interleaved:
+                interleaved.append(True)
+                User.objects.filter(id=user_ids[0]).update(is_active=True)
+                UserProfile.objects.filter(user_id=user_ids[0]).update(is_verified=True)
+                adjust_verification_stats({'active_users': 1, 'verified_profiles': 1})
+            return real_now()
+
+        with mock.patch.object(user_verification.timezone, 'now', side_effect=verify_first_user_elsewhere):
+            with self.captureOnCommitCallbacks(execute=True):
+                result = bulk_verify_users(user_ids, self.admin)
+
+        self.assertEqual(result['verified_count'], 3)
+        stored = model_to_dict(VerificationStats.objects.get(), exclude=['id', 'updated_at'])
+        counted = model_to_dict(recompute_verification_stats(), exclude=['id', 'updated_at'])
+        self.assertEqual(stored, counted)
+
+    def test_query_count_is_constant(self):
+        for bulk_function in (bulk_approve_profiles, bulk_verify_users):
+            query_counts = []
+            for count in (3, 30):
+                user_ids = self.create_users(count)
+                with CaptureQueriesContext(connection) as queries:
+                    with self.captureOnCommitCallbacks(execute=True):
+                        bulk_function(user_ids, self.admin)
+                query_counts.append(len(queries))
+            self.assertEqual(query_counts[0], query_counts[1], bulk_function.__name__)
+
+
+class VerificationStatsTestCase(TestCase):
+    def setUp(self):
+        self.admin = create_admin()
+        self.users = []
+        for index in range(6):
+            user = User.objects.create(username=f'citizen{index}', email=f'c{index}@example.com' if index % 2 else '')
+            UserProfile.objects.create(user=user, is_verified=index < 2)
+            if index % 3:
+                VerificationRequest.objects.create(user=user, reason='Senior citizen ID')
+            self.users.append(user)
+
+    def assertCountersMatch(self):
+        counted = model_to_dict(recompute_verification_stats(), exclude=['id', 'updated_at'])
+        stored = model_to_dict(VerificationStats.objects.get(), exclude=['id', 'updated_at'])
+        self.assertEqual(stored, counted)
+
+    def test_signals_keep_counters_current(self):
+        self.assertCountersMatch()
+
+        profile = UserProfile.objects.get(user=self.users[4])
+        profile.is_verified = True
+        profile.save()
+        user = User.objects.only('id').get(pk=self.users[5].pk)
+        user.is_active = False
+        user.save()
+        request = VerificationRequest.objects.get(user=self.users[1])
+        request.status = 'rejected'
+        request.save()
+        self.users[2].delete()
+        self.assertCountersMatch()
+
+        stats = VerificationStats.objects.get()
+        self.assertEqual((stats.total_users, stats.active_users, stats.email_verified_users), (6, 5, 4))
+        self.assertEqual((stats.total_profiles, stats.verified_profiles), (5, 3))
+        self.assertEqual((stats.pending_requests, stats.rejected_requests), (2, 1))
+
+    def test_stale_instances_do_not_count_a_change_twice(self):
+        first = UserProfile.objects.get(user=self.users[4])
+        second = UserProfile.objects.get(user=self.users[4])
+        first.is_verified = True
+        first.save()
+        second.is_verified = True
+        second.save()
+        self.assertCountersMatch()
+
+        first.delete()
+        second.delete()
+        self.assertCountersMatch()
+
+    def test_saves_that_cannot_change_counters_skip_them(self):
+        user = self.users[0]
+        user.last_login = timezone.now()
+        with self.assertNumQueries(1):
+            user.save(update_fields=['last_login'])
+
+    def test_drifted_counters_are_clamped_on_read(self):
+        get_verification_stats()
+        VerificationStats.objects.update(verified_profiles=F('verified_profiles') - 10)
+
+        self.assertEqual(get_verification_stats()['verified_users'], 0)
+        profile = UserProfile.objects.get(user=self.users[0])
+        profile.is_verified = False
+        profile.save()
+        self.assertEqual(VerificationStats.objects.get().verified_profiles, -9)
+
+    def test_bulk_approve_counts_requests_it_creates(self):
+        without_request = [self.users[0].id, self.users[3].id]
+        self.assertFalse(VerificationRequest.objects.filter(user_id__in=without_request).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_approve_profiles(without_request, self.admin)
+
+        self.assertEqual(VerificationStats.objects.get().approved_requests, 2)
+        self.assertCountersMatch()
+
+    def test_bulk_operations_adjust_counters(self):
+        user_ids = [user.id for user in self.users]
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_approve_profiles(user_ids[:3], self.admin)
+            approve_all_pending_verifications(self.admin)
+        User.objects.filter(id__in=user_ids[3:]).update(is_active=False)
+        adjust_verification_stats({'active_users': -3})
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_verify_users(user_ids[2:], self.admin)
+        self.assertCountersMatch()
+
+    def test_stats_read_one_row(self):
+        VerificationStats.objects.all().delete()
+        self.assertEqual(get_verification_stats()['verified_users'], 2)
+
+        with self.assertNumQueries(1):
+            stats = get_verification_stats()
+        self.assertEqual(stats['total_users'], 6)
+        self.assertEqual(stats['pending_requests'], 4)
+        with self.assertNumQueries(1):
+            stats = get_user_verification_stats()
+        self.assertEqual((stats['total_users'], stats['email_verified_users']), (7, 4))
+
+    def test_recompute_stats_command_fixes_drift(self):
+        VerificationStats.objects.update(verified_profiles=40)
+        output = StringIO()
+        call_command('recompute_stats', stdout=output)
+        self.assertIn('verified_profiles: 40 -> 2', output.getvalue())
+        self.assertEqual(VerificationStats.objects.get().verified_profiles, 2)
+
+
+class UserStatusMatrixTestCase(TestCase):
+    def setUp(self):
+        service = create_service()
+        self.users = [User.objects.create(username=f'citizen{index}') for index in range(3)]
+        for index, user in enumerate(self.users):
+            for number, status in enumerate(['waiting', 'cancelled'][:index + 1]):
+                Queue.objects.create(user=user, service=service, queue_number=f'BIRTH-{index}-{number}', status=status)
+            QueueHistory.objects.create(user=user, service=service, queue_number=f'BIRTH-{index}-9', status='completed',
+                date=timezone.localdate(), created_at=timezone.now(),
+            )
+            for status in ['pending', 'approved'][:index]:
+                Appointment.objects.create(user=user, appointment_date='2026-01-01T09:00Z', service_type='birth', purpose='Test', status=status)
+
+    def test_matrix_in_two_queries(self):
+        with self.assertNumQueries(2):
+            matrix = get_user_status_matrix(user.id for user in self.users)
+
+        self.assertEqual(matrix[self.users[0].id]['queue_statuses'], {
+            'total': 2, 'waiting': 1, 'serving': 0, 'completed': 1, 'cancelled': 0,
+        })
+        self.assertEqual(matrix[self.users[1].id]['queue_statuses']['cancelled'], 1)
+        self.assertEqual(matrix[self.users[0].id]['appointment_statuses']['total'], 0)
+        self.assertEqual(matrix[self.users[2].id]['appointment_statuses'], {
+            'total': 2, 'pending': 1, 'approved': 1, 'rejected': 0, 'completed': 0, 'cancelled': 0,
+        })
+
+    def test_single_user_statuses(self):
+        with self.assertNumQueries(3):
+            statuses = verify_all_user_statuses(self.users[1].id)
+        self.assertEqual(statuses['queue_statuses']['total'], 3)
+        self.assertEqual(statuses['appointment_statuses']['pending'], 1)
+        self.assertEqual(statuses['verification']['status'], 'no_request')
+
+
+class QueueManagementPaginationTestCase(TestCase):
+    def setUp(self):
+        self.admin = create_admin()
+        self.client.force_login(self.admin)
+        self.service = create_service()
+        user = User.objects.create(username='citizen')
+        for index in range(120):
+            Queue.objects.create(
+                user=user,
+                service=self.service,
+                queue_number=f'BIRTH-{index:04d}',
+                priority_level=(1, 2, 3)[index % 3],
+                is_walkin=index % 10 == 0,
+            )
+
+    def test_pages_cover_the_board_with_live_ranks(self):
+        expected_ranks = dict(Queue.objects.live_ranks(self.service, timezone.now().date()))
+        seen = []
+        query_counts = []
+        params = {}
+        while True:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('admin_management:queue_management'), params)
+            query_counts.append(len(queries))
+            seen.extend(response.context['queues'])
+            page = response.context['page']
+            if not page.has_next:
+                break
+            params = {'after': page.next_cursor}
+
+        self.assertEqual(len(query_counts), 3)
+        self.assertEqual(len(set(query_counts)), 1)
+        self.assertEqual([queue.id for queue in seen], list(
+            Queue.objects.filter(is_walkin=False).order_by('priority_level', 'created_at', 'id').values_list('id', flat=True)
+        ))
+        # Ranks still count the walk-ins ahead, which are not listed
+        self.assertEqual({queue.id: queue.live_rank for queue in seen}, {
+            queue_id: rank for queue_id, rank in expected_ranks.items() if queue_id in {queue.id for queue in seen}
+        })
+
+    def test_filters(self):
+        response = self.client.get(reverse('admin_management:queue_management'), {'date': '2000-01-01'})
+        self.assertEqual(list(response.context['queues']), [])
+        response = self.client.get(reverse('admin_management:queue_management'), {'date': '', 'service': self.service.id})
+        self.assertEqual(len(response.context['queues']), 50)
+
+
+class AdminLogViewerTestCase(TestCase):
+    def setUp(self):
+        self.admin = create_admin()
+        self.other_admin = create_admin('auditor')
+        self.client.force_login(self.admin)
+        AdminLog.objects.bulk_create([
+            AdminLog(
+                admin=self.admin if index % 2 else self.other_admin,
+                action='Profile Approval' if index % 3 else 'Queue Management',
+                description=f'Entry {index}'
+            )
+            for index in range(120)
+        ])
+
+    def get_logs(self, **params):
+        return self.client.get(reverse('admin_management:logs'), params)
+
+    def test_pages_have_constant_query_count(self):
+        seen = []
+        query_counts = []
+        params = {'admin': self.admin.id}
+        while True:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.get_logs(**params)
+            query_counts.append(len(queries))
+            seen.extend(log.id for log in response.context['logs'])
+            page = response.context['page']
+            if not page.has_next:
+                break
+            params['after'] = page.next_cursor
+
+        self.assertEqual(len(set(query_counts)), 1)
+        self.assertEqual(seen, list(
+            AdminLog.objects.filter(admin=self.admin).order_by('-timestamp', '-id').values_list('id', flat=True)
+        ))
+
+    def test_filters(self):
+        response = self.get_logs(action='Queue Management')
+        self.assertEqual(len(response.context['logs']), 40)
+
+        today = timezone.localdate()
+        response = self.get_logs(date_from=today, date_to=today)
+        self.assertEqual(len(response.context['logs']), 50)
+        response = self.get_logs(date_to=today - timedelta(days=1))
+        self.assertEqual(len(response.context['logs']), 0)
+
+    def test_invalid_filters_show_no_logs(self):
+        today = timezone.localdate()
+        response = self.get_logs(date_from=today, date_to=today - timedelta(days=1))
+
+        self.assertTrue(response.context['form'].errors)
+        self.assertEqual(len(response.context['logs']), 0)
+        self.assertFalse(response.context['page'].has_next)
+        self.assertContains(response, 'The start date must be on or before the end date.')
+
+        response = self.get_logs(admin=self.admin.id, date_from='not a date')
+        self.assertEqual(len(response.context['logs']), 0)
+
+
+class UserManagementSearchTestCase(TestCase):
+    def setUp(self):
+        self.admin = create_admin()
+        self.client.force_login(self.admin)
+        for index in range(120):
+            user = User.objects.create(
+                username=f'resident{index:03d}',
+                email=f'resident{index:03d}@barangay.ph',
+                first_name='Juan' if index % 2 else 'Maria',
+                last_name='Dela Cruz' if index % 3 == 0 else 'Santos',
+                is_active=index % 4 != 0,
+            )
+            UserProfile.objects.create(user=user, id_number=f'PH-{index:05d}', is_verified=index % 5 == 0)
+
+    def get_users(self, url_name='users_management', **params):
+        return self.client.get(reverse(f'admin_management:{url_name}'), params)
+
+    def test_pages_have_constant_query_count(self):
+        seen = []
+        query_counts = []
+        params = {}
+        while True:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.get_users(**params)
+            query_counts.append(len(queries))
+            seen.extend(profile.id for profile in response.context['users'])
+            page = response.context['page']
+            if not page.has_next:
+                break
+            params['after'] = page.next_cursor
+
+        self.assertEqual(len(set(query_counts)), 1)
+        self.assertEqual(seen, list(UserProfile.objects.order_by('-created_at', '-id').values_list('id', flat=True)))
+
+    def search(self, term, url_name='users_management'):
+        return sorted(profile.user.username for profile in self.get_users(url_name, q=term).context['users'])
+
+    def test_search_fields(self):
+        self.assertEqual(self.search('RESIDENT007'), ['resident007'])
+        self.assertEqual(self.search('ph-00042'), ['resident042'])
+        self.assertEqual(self.search('t011@barangay'), ['resident011'])
+        self.assertEqual(len(self.search('dela cruz juan')), 20)
+        self.assertEqual(self.search('juan t007'), ['resident007'])
+        # Words under three characters fall back to LIKE
+        self.assertEqual(self.search('maria 0@'), [f'resident{index:03d}' for index in range(0, 120, 10)])
+        self.assertEqual(self.search('nobody'), [])
+
+    def test_search_follows_user_changes(self):
+        user = User.objects.get(username='resident005')
+        user.last_name = 'Magsaysay'
+        user.save()
+        self.assertEqual(self.search('magsaysay'), ['resident005'])
+
+        UserProfile.objects.get(user=user).delete()
+        self.assertEqual(self.search('magsaysay'), [])
+
+    def test_search_index_check(self):
+        self.assertEqual(check_profile_search_index(None, databases=['default']), [])
+
+    def test_search_falls_back_to_like_without_index_triggers(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('The FTS5 search table is SQLite only')
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER user_profile_search_update')
+
+        warnings = check_profile_search_index(None, databases=['default'])
+        self.assertEqual([warning.id for warning in warnings], ['admin_management.W001'])
+        self.assertIn('user_profile_search_update', warnings[0].msg)
+
+        user = User.objects.get(username='resident005')
+        user.last_name = 'Magsaysay'
+        user.save()
+        self.assertEqual(self.search('magsaysay'), ['resident005'])
+        self.assertEqual(self.search('juan t007'), ['resident007'])
+
+    def test_filtered_lists(self):
+        self.assertEqual(len(self.search('santos', 'verified_users')), 16)
+        self.assertEqual(len(self.search('dela', 'unverified_users')), 32)
+
+        response = self.get_users('inactive_users')
+        self.assertEqual(response.context['total_inactive'], 30)
+        self.assertEqual(len(response.context['users']), 30)
+        self.assertTrue(all(not profile.user.is_active for profile in response.context['users']))
+
+
+class WalkinQueueNumberingTestCase(TransactionTestCase):
+    def setUp(self):
+        self.service = create_service()
+        # Created up front so parallel requests do not race on get_or_create
+        User.objects.create(username='walkin_system')
+
+    def take_walkin_number(self, _):
+        try:
+            response = Client().post(reverse('public_walkin_queue'), {'service_id': self.service.id})
+            return response.json()
+        finally:
+            connection.close()
+
+    def test_parallel_walkin_posts_get_unique_numbers(self):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(self.take_walkin_number, range(40)))
+
+        self.assertTrue(all(result['success'] for result in results), results)
+        numbers = [result['queue_number'] for result in results]
+        self.assertEqual(len(set(numbers)), len(numbers))
+        self.assertEqual(sorted(numbers), [f'W-{n:03d}' for n in range(1, 41)])
+        self.assertEqual(Queue.objects.filter(is_walkin=True).count(), 40)
+
+    def test_reset_restarts_numbering(self):
+        self.take_walkin_number(None)
+        admin = create_admin()
+        client = Client()
+        client.force_login(admin)
+
+        response = client.post(reverse('admin_management:reset_walkin_queues'))
+
+        self.assertTrue(response.json()['success'])
+        self.assertEqual(self.take_walkin_number(None)['queue_number'], 'W-001')
+
+
+class WalkinQueuesApiTestCase(TestCase):
+    def setUp(self):
+        self.service = create_service()
+        self.user = User.objects.create(username='walkin_system')
+        with self.captureOnCommitCallbacks(execute=True):
+            Queue.objects.create(user=self.user, service=self.service, queue_number='W-001', is_walkin=True)
+        self.url = reverse('admin_management:api_walkin_queues')
+
+    def test_unchanged_queues_revalidate_with_304(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first['Cache-Control'], 'no-cache')
+        self.assertEqual([queue['queue_number'] for queue in first.json()['queues']], ['W-001'])
+
+        with self.assertNumQueries(1):
+            second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.content, b'')
+
+    def test_queue_change_busts_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Queue.objects.filter(queue_number='W-001').update(status='serving')
+            mark_queue_changed()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['queues'][0]['status'], 'serving')
+
+
+    def test_times_match_the_admin_table(self):
+        # Rows streamed into the admin table must read like the rendered ones
+        queue = Queue.objects.get(queue_number='W-001')
+        shown = timezone.localtime(queue.created_at)
+
+        data = self.client.get(self.url).json()['queues'][0]
+
+        self.assertEqual(data['created_at'], shown.strftime('%b %d, %Y'))
+        self.assertEqual(data['created_time'], shown.strftime('%H:%M'))
+
+class WalkinQueueStreamTestCase(TestCase):
+    def setUp(self):
+        self.service = create_service()
+        self.user = User.objects.create(username='walkin_system')
+        self.queue = Queue.objects.create(user=self.user, service=self.service, queue_number='W-001', is_walkin=True)
+
+    def open_stream(self):
+        request = RequestFactory().get(reverse('admin_management:walkin_queues_stream'))
+        response = views.walkin_queues_stream(request)
+        self.addCleanup(self.close_stream, response)
+        return response
+
+    def close_stream(self, response):
+        # Closing sends request_finished, which would close the test
+        # database connection; the test client mutes it the same way
+        request_finished.disconnect(close_old_connections)
+        try:
+            response.close()
+        finally:
+            request_finished.connect(close_old_connections)
+
+    @mock.patch.object(views, 'WALKIN_STREAM_KEEPALIVE_SECONDS', 5)
+    def test_queue_change_is_delivered_as_delta(self):
+        response = self.open_stream()
+        events = iter(response.streaming_content)
+
+        snapshot = next(events).decode()
+        self.assertIn('event: snapshot', snapshot)
+        self.assertIn('W-001', snapshot)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            created = Queue.objects.create(user=self.user, service=self.service, queue_number='W-002', is_walkin=True)
+
+        delta = next(events).decode()
+        self.assertTrue(delta.startswith('event: delta'), delta)
+        payload = json.loads(delta.split('data: ', 1)[1])
+        self.assertEqual([queue['id'] for queue in payload['upserted']], [created.id])
+        self.assertEqual(payload['removed'], [])
+
+    @mock.patch.object(views, 'WALKIN_STREAM_KEEPALIVE_SECONDS', 0.01)
+    def test_idle_stream_sends_keep_alive(self):
+        events = iter(self.open_stream().streaming_content)
+        next(events)
+
+        self.assertEqual(next(events), b': keep-alive\n\n')
+
+    @mock.patch.object(views, 'WALKIN_STREAM_KEEPALIVE_SECONDS', 0.01)
+    @mock.patch.object(views, 'WALKIN_STREAM_MAX_SECONDS', 0.05)
+    def test_stream_ends_at_deadline(self):
+        chunks = list(self.open_stream().streaming_content)
+
+        self.assertIn(b'event: snapshot', chunks[0])
+        self.assertTrue(all(chunk == b': keep-alive\n\n' for chunk in chunks[1:]))
+
+    def test_streams_beyond_limit_get_no_content(self):
+        with mock.patch.object(views, '_walkin_stream_slots', threading.BoundedSemaphore(1)):
+            first = self.open_stream()
+            self.assertEqual(first.status_code, 200)
+
+            self.assertEqual(self.open_stream().status_code, 204)
+
+            self.close_stream(first)
+            self.assertEqual(self.open_stream().status_code, 200)
@@ -15,6 +15,8 @@ urlpatterns = [
     path('appointments/pending/', views.pending_appointments_view, name='pending_appointments'),
     path('appointments/<int:appointment_id>/manage/', views.manage_appointment_view, name='manage_appointment'),
     path('queue/management/', views.queue_management_view, name='queue_management'),
+    path('queue/call-next/', views.call_next_queue_view, name='call_next_queue'),
+    path('queue/bulk-update/', views.bulk_update_queue_status_view, name='bulk_update_queue_status'),
     path('queue/<int:queue_id>/update/', views.update_queue_status_view, name='update_queue_status'),
     path('queue/<int:queue_id>/delete/', views.delete_queue_view, name='delete_queue'),
     path('users/', views.users_management_view, name='users_management'),
@@ -45,4 +47,5 @@ urlpatterns = [
     path('walkin-queues/', views.walkin_queues_view, name='walkin_queues'),
     path('walkin-queues/reset/', views.reset_walkin_queues_view, name='reset_walkin_queues'),
     path('api/walkin-queues/', views.get_walkin_queues_api, name='api_walkin_queues'),
+    path('api/walkin-queues/stream/', views.walkin_queues_stream, name='walkin_queues_stream'),
 ]
\ No newline at end of file
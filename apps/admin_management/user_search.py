@@ -0,0 +1,72 @@
+"""
+User Search
+Indexed substring search over resident profiles
+"""
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+# FTS5 trigram matching needs at least three characters per word
+MIN_INDEXED_WORD_LENGTH = 3
+
+# The SQLite search table and the triggers that keep it in sync
+# (accounts migration 0005_profile_search)
+SQLITE_SEARCH_OBJECTS = (
+    'user_profile_search',
+    'user_profile_search_insert',
+    'user_profile_search_delete',
+    'user_profile_search_update',
+)
+
+
+def missing_sqlite_search_objects(db_connection=connection):
+    """Names from SQLITE_SEARCH_OBJECTS that the SQLite database lacks"""
+    with db_connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT name FROM sqlite_master WHERE name IN (%s)' % ', '.join(['%s'] * len(SQLITE_SEARCH_OBJECTS)),
+            list(SQLITE_SEARCH_OBJECTS)
+        )
+        found = {row[0] for row in cursor.fetchall()}
+    return [name for name in SQLITE_SEARCH_OBJECTS if name not in found]
+
+
+def _fts_query(words):
+    return ' AND '.join('"' + word.replace('"', '""') + '"' for word in words)
+
+
+def search_profiles(profiles, term):
+    """
+    Narrow `profiles` to those matching every word of `term`
+
+    Each word may appear anywhere in the username, email, first or last
+    name or ID number (UserProfile.search_text). On PostgreSQL the LIKE
+    filters are answered from the trigram GIN index; on SQLite words of
+    three or more characters go through the FTS5 trigram table and only
+    shorter ones fall back to LIKE on the rows it returns. Should the
+    table or one of its triggers be gone, e.g. after a migration rebuilt
+    user_profile, every word uses LIKE instead of a stale index.
+
+    Args:
+        profiles: UserProfile queryset to filter
+        term: Text typed by the admin
+
+    Returns:
+        QuerySet
+    """
+    words = term.lower().split()
+    if not words:
+        return profiles
+
+    # One lookup in the small sqlite_master table per search
+    if connection.vendor == 'sqlite' and not missing_sqlite_search_objects():
+        indexed = [word for word in words if len(word) >= MIN_INDEXED_WORD_LENGTH]
+        if indexed:
+            profiles = profiles.filter(id__in=RawSQL(
+                'SELECT rowid FROM user_profile_search WHERE user_profile_search MATCH %s',
+                [_fts_query(indexed)]
+            ))
+        words = [word for word in words if len(word) < MIN_INDEXED_WORD_LENGTH]
+
+    for word in words:
+        profiles = profiles.filter(search_text__contains=word)
+    return profiles
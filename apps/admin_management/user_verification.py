@@ -4,9 +4,21 @@ Functions to handle user account verification and status management
 """
 
 from django.utils import timezone
+from django.db import transaction
 from django.contrib.auth.models import User
 from apps.accounts.models import UserProfile
-from apps.admin_management.models import VerificationRequest, AdminLog
+from apps.admin_management.models import VerificationRequest
+from apps.admin_management.admin_log import log_admin_action
+from apps.admin_management.dashboard_metrics import invalidate_dashboard_metrics
+from apps.admin_management.verification_stats import adjust_verification_stats, get_verification_counters
+
+
+def unique_user_ids(user_ids):
+    """`user_ids` in first-seen order without repeats; '7' and 7 count as one"""
+    unique = {}
+    for user_id in user_ids:
+        unique.setdefault(int(user_id) if str(user_id).isdigit() else user_id, user_id)
+    return list(unique.values())
 
 
 def verify_user_account(user_id, admin_user, reason=""):
@@ -39,8 +51,8 @@ def verify_user_account(user_id, admin_user, reason=""):
             user.profile.save()
         
         # Log the action
-        AdminLog.objects.create(
-            admin=admin_user,
+        log_admin_action(
+            admin_user=admin_user,
             action='User Verification',
             description=f"Verified user account: {user.get_full_name()} ({user.email}) - {reason}"
         )
@@ -98,8 +110,8 @@ def unverify_user_account(user_id, admin_user, reason=""):
             user.profile.save()
         
         # Log the action
-        AdminLog.objects.create(
-            admin=admin_user,
+        log_admin_action(
+            admin_user=admin_user,
             action='User Deactivation',
             description=f"Deactivated user account: {user.get_full_name()} ({user.email}) - {reason}"
         )
@@ -176,25 +188,29 @@ def get_all_unverified_users():
     """
     Get all unverified users
     
+    The total comes from the verification_stats counters; callers page
+    through `users` rather than rendering all of it.
+    
     Returns:
         dict: {
             'total_unverified': int,
-            'users': QuerySet,
+            'users': QuerySet of UserProfile,
             'message': str
         }
     """
     try:
-        unverified = UserProfile.objects.filter(is_verified=False).select_related('user')
+        stats = get_verification_counters()
+        total_unverified = stats.total_profiles - stats.verified_profiles
         
         return {
-            'total_unverified': unverified.count(),
-            'users': unverified,
-            'message': f'Found {unverified.count()} unverified users'
+            'total_unverified': total_unverified,
+            'users': UserProfile.objects.filter(is_verified=False).select_related('user'),
+            'message': f'Found {total_unverified} unverified users'
         }
     except Exception as e:
         return {
             'total_unverified': 0,
-            'users': [],
+            'users': UserProfile.objects.none(),
             'message': f'Error retrieving unverified users: {str(e)}'
         }
 
@@ -206,22 +222,22 @@ def get_all_verified_users():
     Returns:
         dict: {
             'total_verified': int,
-            'users': QuerySet,
+            'users': QuerySet of UserProfile,
             'message': str
         }
     """
     try:
-        verified = UserProfile.objects.filter(is_verified=True).select_related('user')
+        total_verified = get_verification_counters().verified_profiles
         
         return {
-            'total_verified': verified.count(),
-            'users': verified,
-            'message': f'Found {verified.count()} verified users'
+            'total_verified': total_verified,
+            'users': UserProfile.objects.filter(is_verified=True).select_related('user'),
+            'message': f'Found {total_verified} verified users'
         }
     except Exception as e:
         return {
             'total_verified': 0,
-            'users': [],
+            'users': UserProfile.objects.none(),
             'message': f'Error retrieving verified users: {str(e)}'
         }
 
@@ -233,22 +249,23 @@ def get_all_inactive_users():
     Returns:
         dict: {
             'total_inactive': int,
-            'users': QuerySet,
+            'users': QuerySet of UserProfile whose account is inactive,
             'message': str
         }
     """
     try:
-        inactive = User.objects.filter(is_active=False)
+        stats = get_verification_counters()
+        total_inactive = stats.total_users - stats.active_users
         
         return {
-            'total_inactive': inactive.count(),
-            'users': inactive,
-            'message': f'Found {inactive.count()} inactive users'
+            'total_inactive': total_inactive,
+            'users': UserProfile.objects.filter(user__is_active=False).select_related('user'),
+            'message': f'Found {total_inactive} inactive users'
         }
     except Exception as e:
         return {
             'total_inactive': 0,
-            'users': [],
+            'users': UserProfile.objects.none(),
             'message': f'Error retrieving inactive users: {str(e)}'
         }
 
@@ -257,6 +274,9 @@ def get_user_verification_stats():
     """
     Get comprehensive user verification statistics
     
+    One primary-key read of the verification_stats counters row, which
+    the User, UserProfile and VerificationRequest signals keep current.
+    
     Returns:
         dict: {
             'total_users': int,
@@ -269,13 +289,14 @@ def get_user_verification_stats():
         }
     """
     try:
-        total_users = User.objects.count()
-        active_users = User.objects.filter(is_active=True).count()
+        stats = get_verification_counters()
+        total_users = stats.total_users
+        active_users = stats.active_users
         inactive_users = total_users - active_users
-        email_verified = User.objects.exclude(email='').count()
+        email_verified = stats.email_verified_users
         
-        verified_users = UserProfile.objects.filter(is_verified=True).count()
-        unverified_users = UserProfile.objects.filter(is_verified=False).count()
+        verified_users = stats.verified_profiles
+        unverified_users = stats.total_profiles - stats.verified_profiles
         
         verification_rate = (verified_users / total_users * 100) if total_users > 0 else 0
         
@@ -299,6 +320,10 @@ def bulk_verify_users(user_ids, admin_user, reason=""):
     """
     Verify multiple users at once
     
+    All users are loaded with their profiles in one query and activated
+    with one UPDATE per table and one bulk INSERT of log entries, so the
+    query count does not depend on how many ids are given.
+    
     Args:
         user_ids: List of user IDs
         admin_user: Admin user verifying
@@ -312,15 +337,65 @@ def bulk_verify_users(user_ids, admin_user, reason=""):
             'results': list
         }
     """
+    # A user listed twice is verified and reported once
+    user_ids = unique_user_ids(user_ids)
     results = []
-    verified_count = 0
+    verified = {}
     
-    for user_id in user_ids:
-        result = verify_user_account(user_id, admin_user, reason)
-        results.append(result)
-        if result['success']:
-            verified_count += 1
+    try:
+        with transaction.atomic():
+            users = User.objects.select_related('profile').in_bulk(
+                [int(user_id) for user_id in user_ids if str(user_id).isdigit()]
+            )
+            
+            for user_id in user_ids:
+                user = users.get(int(user_id)) if str(user_id).isdigit() else None
+                if user is None:
+                    results.append({
+                        'success': False,
+                        'message': f'User with ID {user_id} not found'
+                    })
+                else:
+                    verified[user.id] = user
+                    results.append({
+                        'success': True,
+                        'message': f'User account {user.get_full_name()} has been verified and activated',
+                        'user': user
+                    })
+            
+            if verified:
+                now = timezone.now()
+                # Each UPDATE only touches rows still in the old state, so an
+                # admin verifying the same users at the same time cannot make
+                # both count the change
+                activated = User.objects.filter(id__in=verified, is_active=False).update(is_active=True)
+                newly_verified = UserProfile.objects.filter(user_id__in=verified, is_verified=False).update(
+                    is_verified=True, verification_date=now, updated_at=now
+                )
+                # update() skips the User and UserProfile signals
+                invalidate_dashboard_metrics()
+                adjust_verification_stats({
+                    'active_users': activated,
+                    'verified_profiles': newly_verified,
+                })
+                
+                for user in verified.values():
+                    user.is_active = True
+                    if hasattr(user, 'profile'):
+                        user.profile.is_verified = True
+                        user.profile.verification_date = now
+                    log_admin_action(
+                        admin_user=admin_user,
+                        action='User Verification',
+                        description=f"Verified user account: {user.get_full_name()} ({user.email}) - {reason}"
+                    )
+    except Exception as e:
+        results = [{
+            'success': False,
+            'message': f'Error verifying user: {str(e)}'
+        } for _ in user_ids]
     
+    verified_count = sum(1 for result in results if result['success'])
     return {
         'total_processed': len(user_ids),
         'verified_count': verified_count,
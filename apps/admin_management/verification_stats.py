@@ -0,0 +1,131 @@
+"""
+Verification Stats
+Materialized user and verification counters kept in one row
+"""
+
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from apps.accounts.models import UserProfile
+from apps.admin_management.models import VerificationRequest, VerificationStats
+
+VERIFICATION_STATS_ID = 1
+
+COUNTER_FIELDS = (
+    'total_users', 'active_users', 'email_verified_users',
+    'total_profiles', 'verified_profiles',
+    'pending_requests', 'approved_requests', 'rejected_requests',
+)
+
+# Fields each tracked model contributes to the counters
+TRACKED_FIELDS = {
+    User: ('is_active', 'email'),
+    UserProfile: ('is_verified',),
+    VerificationRequest: ('status',),
+}
+
+
+def counter_contribution(instance):
+    """What one row adds to the counters"""
+    if isinstance(instance, User):
+        return Counter({
+            'total_users': 1,
+            'active_users': int(instance.is_active),
+            'email_verified_users': int(instance.email != ''),
+        })
+    if isinstance(instance, UserProfile):
+        return Counter({
+            'total_profiles': 1,
+            'verified_profiles': int(instance.is_verified),
+        })
+    return Counter({f'{instance.status}_requests': 1})
+
+
+def request_status_deltas(old_statuses, new_status):
+    """
+    Counter changes for verification requests moved to `new_status`
+
+    Args:
+        old_statuses: Previous status of each request, None for new ones
+        new_status: Status they all end up in
+    """
+    deltas = Counter()
+    for status in old_statuses:
+        if status is not None:
+            deltas[f'{status}_requests'] -= 1
+        deltas[f'{new_status}_requests'] += 1
+    return deltas
+
+
+def _count_verification_stats():
+    """One aggregate query per table: users, profiles and verification requests"""
+    counts = User.objects.aggregate(
+        total_users=Count('id'),
+        active_users=Count('id', filter=Q(is_active=True)),
+        email_verified_users=Count('id', filter=~Q(email='')),
+    )
+    counts.update(UserProfile.objects.aggregate(
+        total_profiles=Count('id'),
+        verified_profiles=Count('id', filter=Q(is_verified=True)),
+    ))
+    counts.update(VerificationRequest.objects.aggregate(
+        pending_requests=Count('id', filter=Q(status='pending')),
+        approved_requests=Count('id', filter=Q(status='approved')),
+        rejected_requests=Count('id', filter=Q(status='rejected')),
+    ))
+    return counts
+
+
+def recompute_verification_stats():
+    """
+    Count everything from scratch and overwrite the counters row
+
+    Returns:
+        VerificationStats: The reconciled row
+    """
+    stats, _ = VerificationStats.objects.update_or_create(
+        pk=VERIFICATION_STATS_ID,
+        defaults=_count_verification_stats()
+    )
+    return stats
+
+
+def adjust_verification_stats(deltas):
+    """
+    Add `deltas` to the counters in the current transaction
+
+    Called by the signals on User, UserProfile and VerificationRequest;
+    code that writes those with update() or bulk_create() bypasses them
+    and must call this itself.
+
+    Args:
+        deltas: Mapping of counter name to the amount it changes by
+    """
+    changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not changes:
+        return
+    if not VerificationStats.objects.filter(pk=VERIFICATION_STATS_ID).update(
+        updated_at=timezone.now(), **changes
+    ):
+        # No row yet: a full count already includes this change
+        recompute_verification_stats()
+
+
+def get_verification_counters():
+    """
+    Get the counters row, a single primary-key read
+
+    Counters are never reported below zero; recompute_stats repairs any
+    drift that got them there.
+
+    Returns:
+        VerificationStats
+    """
+    stats = VerificationStats.objects.filter(pk=VERIFICATION_STATS_ID).first()
+    if stats is None:
+        stats = recompute_verification_stats()
+    for field in COUNTER_FIELDS:
+        setattr(stats, field, max(getattr(stats, field), 0))
+    return stats
@@ -4,20 +4,42 @@ from django.contrib import messages
 from django.utils import timezone
 from django.db.models import Q
 from django.contrib.auth.models import User
-from django.http import JsonResponse
-from django.views.decorators.http import require_http_methods
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.db import transaction
+from django.views.decorators.http import require_http_methods, condition
 from functools import wraps
+from datetime import date as date_cls, datetime, timedelta
+import json
+import threading
+import time
 from apps.accounts.models import UserProfile
 from apps.appointments.models import Appointment
 from apps.queues.models import Queue, Service
+from apps.queues.notifier import queue_notifier
+from apps.queues.utils import (
+    admit_ticket,
+    with_remaining_capacity,
+    next_walkin_number,
+    reset_walkin_sequence,
+    claim_next_queue,
+    complete_queues,
+    get_queue_state_version
+)
 from .models import VerificationRequest, AdminLog
-from .forms import VerificationApprovalForm, AdminCreationForm
+from .admin_log import log_admin_action
+from .forms import VerificationApprovalForm, AdminCreationForm, AdminLogFilterForm, UserSearchForm
+from .dashboard_metrics import get_dashboard_metrics
+from .queue_operations import bulk_update_queue_status, BULK_QUEUE_LIMIT
+from .user_search import search_profiles
+from config.pagination import keyset_paginate
 from .status_utils import (
     verify_user_verification_status,
     verify_queue_status,
     verify_queue_status_value,
     verify_appointment_status,
-    verify_all_user_statuses
+    verify_all_user_statuses,
+    get_user_status_matrix
 )
 from .profile_verification import (
     approve_user_profile,
@@ -120,76 +142,8 @@ def admin_required(view_func):
 
 @admin_required
 def admin_dashboard_view(request):
-    import logging
-    logger = logging.getLogger(__name__)
-    
-    # Initialize all stats with safe defaults
-    pending_verifications = 0
-    pending_appointments = 0
-    total_users = 0
-    today_queues = 0
-    active_walkin_queues = 0
-    
-    try:
-        from django.db.models import Q
-        
-        # Count all unverified users (both with and without VerificationRequest records)
-        try:
-            pending_verifications = User.objects.filter(profile__is_verified=False).count()
-        except Exception as e:
-            logger.error(f'Error counting pending verifications: {str(e)}')
-            pending_verifications = 0
-        
-        try:
-            pending_appointments = Appointment.objects.filter(status='pending').count()
-        except Exception as e:
-            logger.error(f'Error counting pending appointments: {str(e)}')
-            pending_appointments = 0
-        
-        try:
-            total_users = User.objects.filter(profile__isnull=False).count()
-        except Exception as e:
-            logger.error(f'Error counting total users: {str(e)}')
-            total_users = 0
-        
-        # Count active online queues only (exclude walk-in queues)
-        try:
-            today_queues = Queue.objects.filter(
-                Q(status__in=['waiting', 'serving']) & ~Q(queue_number__startswith='W-')
-            ).count()
-        except Exception as e:
-            logger.error(f'Error counting online queues: {str(e)}')
-            today_queues = 0
-        
-        # Count active walk-in queues
-        try:
-            active_walkin_queues = Queue.objects.filter(
-                queue_number__startswith='W-',
-                status__in=['waiting', 'serving']
-            ).count()
-        except Exception as e:
-            logger.error(f'Error counting walk-in queues: {str(e)}')
-            active_walkin_queues = 0
-        
-        context = {
-            'pending_verifications': pending_verifications,
-            'pending_appointments': pending_appointments,
-            'total_users': total_users,
-            'today_queues': today_queues,
-            'active_walkin_queues': active_walkin_queues,
-        }
-        return render(request, 'pages/admin/dashboard.html', context)
-    
-    except Exception as e:
-        logger.exception(f'Admin dashboard view critical error for user {request.user.id}: {str(e)}')
-        # Return dashboard with default values rather than showing error
-        return render(request, 'pages/admin/dashboard.html', {
-            'pending_verifications': pending_verifications,
-            'pending_appointments': pending_appointments,
-            'total_users': total_users,
-            'today_queues': today_queues,
-            'active_walkin_queues': active_walkin_queues,
-        })
+    context = get_dashboard_metrics()
+    return render(request, 'pages/admin/dashboard.html', context)
 
 @admin_required
 def pending_verifications_view(request):
@@ -225,7 +179,9 @@ def approve_all_pending_verifications_view(request):
     """Approve all pending verifications at once"""
     if request.method == 'POST':
         result = approve_all_pending_verifications(request.user, "Auto-approved by admin")
-        if result['total_approved'] > 0:
+        if not result['success']:
+            messages.error(request, result['message'])
+        elif result['total_approved'] > 0:
             messages.success(request, result['message'])
         else:
             messages.info(request, result['message'])
@@ -309,8 +265,8 @@ def manage_appointment_view(request, appointment_id):
             appointment.approved_by = request.user
             appointment.save()
             
-            AdminLog.objects.create(
-                admin=request.user,
+            log_admin_action(
+                admin_user=request.user,
                 action='Appointment Management',
                 description=f"Appointment {status.capitalize()} for {appointment.user.get_full_name()}"
             )
@@ -323,18 +279,83 @@ def manage_appointment_view(request, appointment_id):
     }
     return render(request, 'pages/admin/manage_appointment.html', context)
 
+QUEUE_MANAGEMENT_PAGE_SIZE = 50
+QUEUE_MANAGEMENT_ORDERING = ('priority_level', 'created_at', 'id')
+
 @admin_required
 def queue_management_view(request):
-    from django.db.models import Q
-    today_queues = Queue.objects.filter(
-        Q(status__in=['waiting', 'serving']) & ~Q(queue_number__startswith='W-')
-    ).order_by('priority_level', 'created_at')
+    """Online (non walk-in) active tickets, a keyset page at a time"""
+    queues = Queue.objects.active().filter(is_walkin=False)
+    
+    # Today by default; a blank date shows every day still holding active tickets
+    date_filter = request.GET.get('date', timezone.now().date().isoformat())
+    if date_filter:
+        try:
+            queues = queues.filter(date=date_cls.fromisoformat(date_filter))
+        except ValueError:
+            messages.error(request, 'Invalid date filter.')
+            date_filter = ''
+    
+    service_filter = request.GET.get('service', '')
+    if service_filter.isdigit():
+        queues = queues.filter(service_id=service_filter)
+    else:
+        service_filter = ''
+    
+    page = keyset_paginate(
+        queues.with_counted_rank().select_related('user', 'service'),
+        QUEUE_MANAGEMENT_ORDERING,
+        cursor=request.GET.get('after'),
+        per_page=QUEUE_MANAGEMENT_PAGE_SIZE
+    )
     
     context = {
-        'queues': today_queues,
+        'queues': page.object_list,
+        'page': page,
+        'services': Service.objects.filter(is_active=True).order_by('name'),
+        'date_filter': date_filter,
+        'service_filter': service_filter,
+        'bulk_queue_limit': BULK_QUEUE_LIMIT,
     }
     return render(request, 'pages/admin/queue_management.html', context)
 
+@require_http_methods(["POST"])
+@admin_required
+def call_next_queue_view(request):
+    """Claim the next waiting ticket of a service for this counter"""
+    try:
+        service = Service.objects.get(id=request.POST.get('service_id'), is_active=True)
+    except (Service.DoesNotExist, ValueError):
+        messages.error(request, 'Please select an active service.')
+        return redirect('admin_management:queue_management')
+    
+    queue = claim_next_queue(service)
+    if queue is None:
+        messages.info(request, f'No one is waiting for {service.name}.')
+    else:
+        messages.success(request, f'Now serving {queue.queue_number} for {service.name}.')
+    
+    return redirect('admin_management:queue_management')
+
+@require_http_methods(["POST"])
+@admin_required
+def bulk_update_queue_status_view(request):
+    """Serve the next N, cancel or complete the selected tickets in one request"""
+    result = bulk_update_queue_status(
+        request.user,
+        request.POST.get('action'),
+        queue_ids=request.POST.getlist('queue_ids'),
+        service_id=request.POST.get('service_id'),
+        count=request.POST.get('count')
+    )
+    
+    if result['success']:
+        messages.success(request, result['message'])
+    else:
+        messages.error(request, result['message'])
+    
+    return redirect('admin_management:queue_management')
+
 @admin_required
 def update_queue_status_view(request, queue_id):
     queue_verification = verify_queue_status(queue_id)
@@ -352,9 +373,10 @@ def update_queue_status_view(request, queue_id):
         if not status_verification['is_valid']:
             messages.error(request, f"Invalid status. Valid options: {', '.join(status_verification['valid_statuses'])}")
         elif status == 'completed':
-            queue_number = queue.queue_number
-            queue.delete()
-            messages.success(request, f'Queue {queue_number} completed and deleted!')
+            if complete_queues([queue]):
+                messages.success(request, f'Queue {queue.queue_number} completed and archived!')
+            else:
+                messages.error(request, f'Queue {queue.queue_number} was already completed.')
         else:
             queue.status = status
             if status == 'serving':
@@ -375,12 +397,41 @@ def delete_queue_view(request, queue_id):
     
     return redirect('admin_management:queue_management')
 
+USER_LIST_PAGE_SIZE = 50
+USER_LIST_ORDERING = ('-created_at', '-id')
+
+def _user_list_page(request, profiles):
+    """Search and keyset-page a UserProfile list; returns the page, the search form and the query to keep"""
+    form = UserSearchForm(request.GET or None)
+    if form.is_valid():
+        profiles = search_profiles(profiles, form.cleaned_data['q'])
+    
+    page = keyset_paginate(
+        profiles.select_related('user'),
+        USER_LIST_ORDERING,
+        cursor=request.GET.get('after'),
+        per_page=USER_LIST_PAGE_SIZE
+    )
+    
+    # Keep the search when following the cursor
+    filter_query = request.GET.copy()
+    filter_query.pop('after', None)
+    return page, form, filter_query.urlencode()
+
 @admin_required
 def users_management_view(request):
-    users = UserProfile.objects.all().order_by('-created_at')
+    page, form, filter_query = _user_list_page(request, UserProfile.objects.all())
+    
+    # Status counts for the users on this page in two grouped queries
+    status_matrix = get_user_status_matrix(profile.user_id for profile in page)
+    for profile in page:
+        profile.statuses = status_matrix[profile.user_id]
     
     context = {
-        'users': users,
+        'users': page.object_list,
+        'page': page,
+        'form': form,
+        'filter_query': filter_query,
     }
     return render(request, 'pages/admin/users_management.html', context)
 
@@ -445,12 +496,44 @@ def unverify_user_profile_view(request, user_profile_id):
     return render(request, 'pages/admin/check_account_status.html', context)
 
 
+ADMIN_LOG_PAGE_SIZE = 50
+ADMIN_LOG_ORDERING = ('-timestamp', '-id')
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
 @admin_required
 def admin_logs_view(request):
-    logs = AdminLog.objects.all().order_by('-timestamp')[:100]
+    """Admin activity, newest first, a keyset page at a time"""
+    logs = AdminLog.objects.select_related('admin')
+    form = AdminLogFilterForm(request.GET or None)
+    
+    if form.is_valid():
+        if form.cleaned_data['admin']:
+            logs = logs.filter(admin=form.cleaned_data['admin'])
+        if form.cleaned_data['action']:
+            logs = logs.filter(action=form.cleaned_data['action'])
+        # Day bounds in the site timezone, as ranges the timestamp indexes can seek on
+        if form.cleaned_data['date_from']:
+            logs = logs.filter(timestamp__gte=_start_of_day(form.cleaned_data['date_from']))
+        if form.cleaned_data['date_to']:
+            logs = logs.filter(timestamp__lt=_start_of_day(form.cleaned_data['date_to'] + timedelta(days=1)))
+    elif form.is_bound:
+        # Show the errors over an empty list rather than every log unfiltered
+        logs = logs.none()
+    
+    page = keyset_paginate(logs, ADMIN_LOG_ORDERING, cursor=request.GET.get('after'), per_page=ADMIN_LOG_PAGE_SIZE)
+    
+    # Keep the filters when following the cursor
+    filter_query = request.GET.copy()
+    filter_query.pop('after', None)
     
     context = {
-        'logs': logs,
+        'logs': page.object_list,
+        'page': page,
+        'form': form,
+        'filter_query': filter_query.urlencode(),
+        'page_actions': sorted({log.action for log in page.object_list}),
     }
     return render(request, 'pages/admin/logs.html', context)
 
@@ -474,8 +557,8 @@ def create_admin_view(request):
             admin_user = form.save()
             
             # Log the action
-            AdminLog.objects.create(
-                admin=request.user,
+            log_admin_action(
+                admin_user=request.user,
                 action='Admin Creation',
                 description=f"Created new admin account: {admin_user.get_full_name() or admin_user.username}"
             )
@@ -511,8 +594,8 @@ def delete_admin_view(request, admin_id):
         admin_user.save()
         
         # Log the action
-        AdminLog.objects.create(
-            admin=request.user,
+        log_admin_action(
+            admin_user=request.user,
             action='Admin Removal',
             description=f"Removed admin privileges from: {admin_username}"
         )
@@ -659,10 +742,14 @@ def user_verification_stats_view(request):
 def unverified_users_view(request):
     """View all unverified users"""
     data = get_all_unverified_users()
+    page, form, filter_query = _user_list_page(request, data['users'])
     
     context = {
-        'users': data['users'],
+        'users': page.object_list,
         'total_unverified': data['total_unverified'],
+        'page': page,
+        'form': form,
+        'filter_query': filter_query,
     }
     return render(request, 'pages/admin/unverified_users.html', context)
 
@@ -671,10 +758,14 @@ def unverified_users_view(request):
 def verified_users_view(request):
     """View all verified users"""
     data = get_all_verified_users()
+    page, form, filter_query = _user_list_page(request, data['users'])
     
     context = {
-        'users': data['users'],
+        'users': page.object_list,
         'total_verified': data['total_verified'],
+        'page': page,
+        'form': form,
+        'filter_query': filter_query,
     }
     return render(request, 'pages/admin/verified_users.html', context)
 
@@ -683,10 +774,14 @@ def verified_users_view(request):
 def inactive_users_view(request):
     """View all inactive users"""
     data = get_all_inactive_users()
+    page, form, filter_query = _user_list_page(request, data['users'])
     
     context = {
-        'users': data['users'],
+        'users': page.object_list,
         'total_inactive': data['total_inactive'],
+        'page': page,
+        'form': form,
+        'filter_query': filter_query,
     }
     return render(request, 'pages/admin/inactive_users.html', context)
 
@@ -762,7 +857,7 @@ def user_verification_status_view(request, user_id):
 def walkin_queues_view(request):
     """Admin view for managing walk-in queues"""
     walkin_queues = Queue.objects.filter(
-        queue_number__startswith='W-'
+        is_walkin=True
     ).select_related('user', 'service').order_by('created_at')
     
     context = {
@@ -791,30 +886,6 @@ def public_walkin_queue_view(request):
                 'error': 'Selected service is not available'
             })
         
-        # Generate new walk-in queue number - find the highest existing number
-        from django.db.models import Max
-        from django.db.models.functions import Cast
-        from django.db import models as dj_models
-        
-        # Get all walk-in queue numbers and find the max
-        existing_queues = Queue.objects.filter(
-            queue_number__startswith='W-'
-        ).values_list('queue_number', flat=True)
-        
-        max_number = 0
-        for queue_num in existing_queues:
-            try:
-                # Extract number from W-XXX format
-                num = int(queue_num.split('-')[1])
-                if num > max_number:
-                    max_number = num
-            except (IndexError, ValueError):
-                continue
-        
-        # Generate next queue number
-        next_number = max_number + 1
-        queue_number = f"W-{next_number:03d}"
-        
         # Get or create a system user for walk-in queues
         system_user, _ = User.objects.get_or_create(
             username='walkin_system',
@@ -827,14 +898,28 @@ def public_walkin_queue_view(request):
         
         # Create the queue entry
         try:
-            queue = Queue.objects.create(
-                user=system_user,
-                service=service,
-                queue_number=queue_number,
-                priority_level=3,  # Regular priority
-                status='waiting',
-                date=timezone.now().date()
-            )
+            today = timezone.now().date()
+            with transaction.atomic():
+                # Walk-ins count against the service's daily capacity
+                if admit_ticket(service, today, numbered=False) is None:
+                    return JsonResponse({
+                        'success': False,
+                        'error': f'{service.name} has no queue slots left today',
+                        'remaining': 0,
+                    })
+                
+                # Allocate the next walk-in number from the shared counter
+                queue_number = f"W-{next_walkin_number():03d}"
+                
+                queue = Queue.objects.create(
+                    user=system_user,
+                    service=service,
+                    queue_number=queue_number,
+                    priority_level=3,  # Regular priority
+                    status='waiting',
+                    is_walkin=True,
+                    date=today
+                )
             
             # Return JSON response for AJAX
             return JsonResponse({
@@ -843,6 +928,7 @@ def public_walkin_queue_view(request):
                 'created_at': queue.created_at.strftime('%b %d, %Y'),
                 'created_time': queue.created_at.strftime('%H:%M'),
                 'service': queue.service.name,
+                'remaining': with_remaining_capacity(Service.objects.filter(pk=service.pk)).values_list('remaining_today', flat=True).get(),
             })
         except Exception as e:
             return JsonResponse({
@@ -852,10 +938,10 @@ def public_walkin_queue_view(request):
     
     # GET request - return the page with existing walk-in queues and services
     walkin_queues = Queue.objects.filter(
-        queue_number__startswith='W-'
+        is_walkin=True
     ).select_related('service').order_by('created_at')[:20]  # Show first 20
     
-    services = Service.objects.filter(is_active=True).order_by('name')
+    services = with_remaining_capacity(Service.objects.filter(is_active=True)).order_by('name')
     
     context = {
         'queues': walkin_queues,
@@ -864,28 +950,111 @@ def public_walkin_queue_view(request):
     return render(request, 'pages/walkin_queue_public.html', context)
 
 
-@require_http_methods(["GET"])
-def get_walkin_queues_api(request):
-    """API endpoint to get recent walk-in queues as JSON"""
+def _recent_walkin_queues():
+    """Serialized walk-in queues shown on the public board"""
     walkin_queues = Queue.objects.filter(
-        queue_number__startswith='W-'
+        is_walkin=True
     ).select_related('service').order_by('created_at')[:20]
     
     queues_data = []
     for queue in walkin_queues:
+        created_at = timezone.localtime(queue.created_at)
         queues_data.append({
             'id': queue.id,
             'queue_number': queue.queue_number,
             'service': queue.service.name,
-            'created_at': queue.created_at.strftime('%b %d, %Y'),
-            'created_time': queue.created_at.strftime('%H:%M'),
+            'created_at': created_at.strftime('%b %d, %Y'),
+            'created_time': created_at.strftime('%H:%M'),
             'status': queue.status,
         })
-    
-    return JsonResponse({
+    return queues_data
+
+
+def _walkin_queues_etag(request):
+    return f"walkin-{get_queue_state_version()}"
+
+
+@require_http_methods(["GET"])
+@condition(etag_func=_walkin_queues_etag)
+def get_walkin_queues_api(request):
+    """API endpoint to get recent walk-in queues as JSON"""
+    response = JsonResponse({
         'success': True,
-        'queues': queues_data,
+        'queues': _recent_walkin_queues(),
     })
+    # Let clients keep the body and revalidate it with If-None-Match
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+# How long one stream stays open before the browser reconnects, and how
+# often an idle stream sends a keep-alive comment
+WALKIN_STREAM_MAX_SECONDS = 300
+WALKIN_STREAM_KEEPALIVE_SECONDS = 15
+
+
+def _walkin_queue_events():
+    """Server-sent events: one snapshot, then deltas whenever a queue row changes"""
+    version = queue_notifier.version
+    current = {queue['id']: queue for queue in _recent_walkin_queues()}
+    yield f"retry: 3000\nevent: snapshot\ndata: {json.dumps(list(current.values()))}\n\n"
+    
+    deadline = time.monotonic() + WALKIN_STREAM_MAX_SECONDS
+    while time.monotonic() < deadline:
+        new_version = queue_notifier.wait(version, timeout=WALKIN_STREAM_KEEPALIVE_SECONDS)
+        if new_version == version:
+            yield ": keep-alive\n\n"
+            continue
+        version = new_version
+        
+        latest = {queue['id']: queue for queue in _recent_walkin_queues()}
+        delta = {
+            'upserted': [queue for queue_id, queue in latest.items() if current.get(queue_id) != queue],
+            'removed': [queue_id for queue_id in current if queue_id not in latest],
+        }
+        current = latest
+        if delta['upserted'] or delta['removed']:
+            yield f"event: delta\ndata: {json.dumps(delta)}\n\n"
+
+
+# An open stream ties up a worker thread, so only a few run per process
+_walkin_stream_slots = threading.BoundedSemaphore(settings.WALKIN_STREAM_MAX_CONNECTIONS)
+
+
+class _WalkinEventStream:
+    """Event stream body that gives its slot back when the response is closed"""
+    
+    def __init__(self, slot):
+        self._slot = slot
+        self._events = _walkin_queue_events()
+        self._released = False
+    
+    def __iter__(self):
+        return self._events
+    
+    def close(self):
+        self._events.close()
+        if not self._released:
+            self._released = True
+            self._slot.release()
+
+
+@require_http_methods(["GET"])
+def walkin_queues_stream(request):
+    """
+    Stream walk-in queue changes to boards and kiosks
+    
+    When every stream slot of this process is taken the answer is 204 No
+    Content, which tells EventSource not to reconnect; the page then polls
+    the ETag API instead of holding another worker thread.
+    """
+    slot = _walkin_stream_slots
+    if not slot.acquire(blocking=False):
+        return HttpResponse(status=204)
+    response = StreamingHttpResponse(_WalkinEventStream(slot), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 
 @require_http_methods(["POST"])
@@ -893,11 +1062,13 @@ def get_walkin_queues_api(request):
 def reset_walkin_queues_view(request):
     """Reset walk-in queue numbers back to W-001 (Admin only)"""
     try:
-        # Delete all walk-in queues
-        deleted_count, _ = Queue.objects.filter(queue_number__startswith='W-').delete()
+        # Delete all walk-in queues and restart numbering at W-001
+        with transaction.atomic():
+            deleted_count, _ = Queue.objects.filter(is_walkin=True).delete()
+            reset_walkin_sequence()
         
-        AdminLog.objects.create(
-            admin=request.user,
+        log_admin_action(
+            admin_user=request.user,
             action='Walk-In Queue Management',
             description=f"Reset walk-in queues. Deleted {deleted_count} queue entries."
         )
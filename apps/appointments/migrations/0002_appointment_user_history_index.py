@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-17 04:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='appointment_user_created_idx'),
+        ),
+    ]
@@ -29,6 +29,7 @@ class Appointment(models.Model):
         ordering = ['-appointment_date']
         indexes = [
             models.Index(fields=['user', 'status']),
+            models.Index(fields=['user', '-created_at', '-id'], name='appointment_user_created_idx'),
             models.Index(fields=['appointment_date']),
             models.Index(fields=['status']),
         ]
@@ -1,4 +1,41 @@
+import re
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+
+from .models import Appointment
+from .views import HISTORY_PAGE_SIZE
 
 class AppointmentsTestCase(TestCase):
     pass
+
+
+class AppointmentHistoryTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('citizen', password='Citizen@12345')
+        other = User.objects.create_user('neighbour', password='Citizen@12345')
+        for index in range(60):
+            Appointment.objects.create(
+                user=self.user if index % 4 else other,
+                appointment_date='2026-01-01T09:00Z',
+                service_type='birth',
+                purpose=f'Visit {index}',
+            )
+        self.client.force_login(self.user)
+
+    def test_scrolls_through_own_history_in_bounded_pages(self):
+        response = self.client.get(reverse('appointments:my_appointments'))
+        self.assertEqual(len(response.context['appointments']), HISTORY_PAGE_SIZE)
+        seen = [appointment.id for appointment in response.context['appointments']]
+
+        cursor = response.context['page'].next_cursor
+        while cursor:
+            with self.assertNumQueries(3):
+                data = self.client.get(reverse('appointments:my_appointments_api'), {'after': cursor}).json()
+            seen.extend(int(pk) for pk in re.findall(r'/appointment/detail/(\d+)/', data['html']))
+            cursor = data['next_cursor']
+
+        self.assertEqual(seen, list(
+            Appointment.objects.filter(user=self.user).order_by('-created_at', '-id').values_list('id', flat=True)
+        ))
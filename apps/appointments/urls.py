@@ -6,6 +6,7 @@ app_name = 'appointments'
 urlpatterns = [
     path('book/', views.book_appointment_view, name='book'),
     path('my-appointments/', views.my_appointments_view, name='my_appointments'),
+    path('my-appointments/api/', views.my_appointments_api, name='my_appointments_api'),
     path('detail/<int:appointment_id>/', views.appointment_detail_view, name='detail'),
     path('cancel/<int:appointment_id>/', views.cancel_appointment_view, name='cancel'),
 ]
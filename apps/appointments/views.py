@@ -2,8 +2,12 @@ from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.utils import timezone
+from django.http import JsonResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
 from .models import Appointment
 from .forms import AppointmentForm
+from config.pagination import keyset_paginate
 
 @login_required
 def book_appointment_view(request):
@@ -27,16 +31,38 @@ def book_appointment_view(request):
     context = {'form': form}
     return render(request, 'pages/appointments/book.html', context)
 
+HISTORY_PAGE_SIZE = 25
+HISTORY_ORDERING = ('-created_at', '-id')
+
+def _appointments_page(request):
+    # The user's appointments, most recently booked first
+    return keyset_paginate(
+        Appointment.objects.filter(user=request.user),
+        HISTORY_ORDERING,
+        cursor=request.GET.get('after'),
+        per_page=HISTORY_PAGE_SIZE
+    )
+
 @login_required
 def my_appointments_view(request):
-    # Get all appointments for the user, ordered by most recent first
-    appointments = Appointment.objects.filter(user=request.user).order_by('-created_at')
+    page = _appointments_page(request)
     
     context = {
-        'appointments': appointments,
+        'appointments': page.object_list,
+        'page': page,
+        'history_api_url': reverse('appointments:my_appointments_api'),
     }
     return render(request, 'pages/appointments/my_appointments.html', context)
 
+@login_required
+def my_appointments_api(request):
+    """Next page of the user's appointments as rendered rows, for infinite scroll"""
+    page = _appointments_page(request)
+    return JsonResponse({
+        'html': render_to_string('components/appointment_rows.html', {'appointments': page.object_list}, request=request),
+        'next_cursor': page.next_cursor,
+    })
+
 @login_required
 def appointment_detail_view(request, appointment_id):
     appointment = get_object_or_404(Appointment, id=appointment_id, user=request.user)
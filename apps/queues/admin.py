@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Service, Queue
+from .models import Service, Queue, ServiceStats, QueueHistory
 
 @admin.register(Service)
 class ServiceAdmin(admin.ModelAdmin):
@@ -13,3 +13,14 @@ class QueueAdmin(admin.ModelAdmin):
     list_filter = ('status', 'date', 'service', 'priority_level')
     search_fields = ('queue_number', 'user__username')
     readonly_fields = ('queue_number', 'created_at')
+
+@admin.register(ServiceStats)
+class ServiceStatsAdmin(admin.ModelAdmin):
+    list_display = ('service', 'avg_service_seconds', 'completed_count', 'updated_at')
+    readonly_fields = ('avg_service_seconds', 'completed_count', 'updated_at')
+
+@admin.register(QueueHistory)
+class QueueHistoryAdmin(admin.ModelAdmin):
+    list_display = ('queue_number', 'user', 'service', 'status', 'date', 'completed_at')
+    list_filter = ('status', 'date', 'service')
+    search_fields = ('queue_number', 'user__username')
@@ -1,5 +1,6 @@
 from django import forms
 from .models import Queue, Service
+from .utils import with_remaining_capacity
 
 class QueueCreationForm(forms.Form):
     service = forms.ModelChoiceField(
@@ -11,6 +12,15 @@ class QueueCreationForm(forms.Form):
         label='Select Service',
         empty_label='-- Choose a Service --'
     )
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        service_field = self.fields['service']
+        service_field.queryset = with_remaining_capacity(service_field.queryset)
+        service_field.label_from_instance = lambda service: (
+            f"{service.name} ({service.remaining_today} left today)" if service.remaining_today
+            else f"{service.name} (full today)"
+        )
 
 class ServiceCreationForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,99 @@
+from datetime import date as date_cls
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from apps.queues.models import Queue, QueueSequence
+from apps.queues.utils import archive_queues, reset_walkin_sequence
+
+
+class Command(BaseCommand):
+    help = 'Closes and archives queue tickets left over from previous days'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--before',
+            help='Roll over tickets dated before this day (YYYY-MM-DD, default: today)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Tickets moved per transaction (default: 500)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many tickets would be rolled over'
+        )
+
+    def handle(self, *args, **options):
+        if options['before']:
+            try:
+                cutoff = date_cls.fromisoformat(options['before'])
+            except ValueError:
+                raise CommandError(f"Invalid --before date: {options['before']}")
+        else:
+            cutoff = timezone.now().date()
+        if cutoff > timezone.now().date():
+            # Would clear today's sequences while tickets are still being numbered
+            raise CommandError(f'--before cannot be after today: {cutoff}')
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be at least 1')
+
+        stale = Queue.objects.filter(date__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(f'{stale.count()} tickets dated before {cutoff} would be rolled over')
+            return
+
+        started = time.monotonic()
+        closed_count = 0
+        archived_count = 0
+
+        while True:
+            with transaction.atomic():
+                # Small transactions keep locks short while the system is live;
+                # rows a counter is touching right now are skipped and picked up
+                # by the next run
+                chunk = stale.order_by('id')
+                if connection.features.has_select_for_update_skip_locked:
+                    chunk = chunk.select_for_update(skip_locked=True)
+                queues = list(chunk[:chunk_size])
+                if not queues:
+                    break
+
+                # Close open tickets in the archive: nobody came back for waiting
+                # ones, and ones already at a counter count as completed as of
+                # now. Their service times span the night, so they are not fed
+                # to the running averages.
+                closed_at = timezone.now()
+                for queue in queues:
+                    if queue.status == 'waiting':
+                        queue.status = 'cancelled'
+                        closed_count += 1
+                    elif queue.status == 'serving':
+                        queue.status = 'completed'
+                        queue.completed_at = closed_at
+                        closed_count += 1
+
+                archived_count += archive_queues(queues)
+
+            self.stdout.write(f'  archived {archived_count} tickets ({time.monotonic() - started:.2f}s)')
+
+        sequences_deleted, _ = QueueSequence.objects.filter(date__lt=cutoff).delete()
+
+        walkin_reset = not Queue.objects.filter(is_walkin=True).exists()
+        if walkin_reset:
+            reset_walkin_sequence()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Rolled over tickets dated before {cutoff}: closed {closed_count}, '
+                f'archived {archived_count}, cleared {sequences_deleted} daily counters'
+                f'{", reset walk-in numbering" if walkin_reset else ""} '
+                f'in {time.monotonic() - started:.2f}s'
+            )
+        )
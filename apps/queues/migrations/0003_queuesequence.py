@@ -0,0 +1,30 @@
+# Generated by Django 4.2.11 on 2026-10-17 03:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('queues', '0002_queue_is_walkin'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueueSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('last_number', models.PositiveIntegerField(default=0)),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sequences', to='queues.service')),
+            ],
+            options={
+                'db_table': 'queue_sequence',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='queuesequence',
+            constraint=models.UniqueConstraint(fields=('service', 'date'), name='unique_queue_sequence_per_day'),
+        ),
+    ]
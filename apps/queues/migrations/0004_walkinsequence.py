@@ -0,0 +1,38 @@
+# Generated by Django 4.2.11 on 2026-10-17 03:45
+
+from django.db import migrations, models
+
+
+def seed_walkin_sequence(apps, schema_editor):
+    Queue = apps.get_model('queues', 'Queue')
+    WalkinSequence = apps.get_model('queues', 'WalkinSequence')
+    
+    last_number = 0
+    for queue_number in Queue.objects.filter(queue_number__startswith='W-').values_list('queue_number', flat=True).iterator():
+        try:
+            last_number = max(last_number, int(queue_number.split('-')[1]))
+        except (IndexError, ValueError):
+            continue
+    
+    WalkinSequence.objects.update_or_create(pk=1, defaults={'last_number': last_number})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('queues', '0003_queuesequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalkinSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_number', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'walkin_sequence',
+            },
+        ),
+        migrations.RunPython(seed_walkin_sequence, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.11 on 2026-10-17 03:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('queues', '0004_walkinsequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ServiceStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('avg_service_seconds', models.FloatField(default=0)),
+                ('completed_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('service', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='queues.service')),
+            ],
+            options={
+                'db_table': 'service_stats',
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.11 on 2026-10-17 03:53
+
+from django.db import migrations, models
+
+
+def create_queue_state(apps, schema_editor):
+    QueueState = apps.get_model('queues', 'QueueState')
+    QueueState.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('queues', '0005_servicestats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueueState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'queue_state',
+            },
+        ),
+        migrations.RunPython(create_queue_state, migrations.RunPython.noop),
+    ]
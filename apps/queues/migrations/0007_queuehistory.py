@@ -0,0 +1,38 @@
+# Generated by Django 4.2.11 on 2026-10-17 03:55
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('queues', '0006_queuestate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueueHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('queue_number', models.CharField(max_length=20)),
+                ('priority_level', models.IntegerField(default=3)),
+                ('status', models.CharField(choices=[('waiting', 'Waiting'), ('serving', 'Being Served'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('is_walkin', models.BooleanField(default=False)),
+                ('date', models.DateField()),
+                ('created_at', models.DateTimeField()),
+                ('served_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='queue_history', to='queues.service')),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='queue_history', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'queue_history',
+                'ordering': ['-completed_at'],
+                'indexes': [models.Index(fields=['date', 'service'], name='queue_histo_date_2adc60_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.11 on 2026-10-17 03:57
+
+from django.db import migrations, models
+
+
+def backfill_walkin_flag(apps, schema_editor):
+    Queue = apps.get_model('queues', 'Queue')
+    QueueHistory = apps.get_model('queues', 'QueueHistory')
+    Queue.objects.filter(queue_number__startswith='W-', is_walkin=False).update(is_walkin=True)
+    QueueHistory.objects.filter(queue_number__startswith='W-', is_walkin=False).update(is_walkin=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('queues', '0007_queuehistory'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_walkin_flag, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='queue',
+            index=models.Index(fields=['is_walkin', 'status', 'created_at'], name='queue_is_walk_9dedc9_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.11 on 2026-10-17 03:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('queues', '0008_walkin_flag_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='queue',
+            name='queue_status_cfc397_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='queue',
+            name='queue_user_id_046867_idx',
+        ),
+        migrations.AddIndex(
+            model_name='queue',
+            index=models.Index(fields=['service', 'date', 'status', 'priority_level'], name='queue_service_day_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='queue',
+            index=models.Index(fields=['user', 'date', 'status'], name='queue_user_day_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='queue',
+            index=models.Index(condition=models.Q(('status__in', ['waiting', 'serving'])), fields=['service', 'date', 'priority_level', 'created_at'], name='queue_active_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='queue',
+            index=models.Index(fields=['status', 'priority_level', 'created_at'], name='queue_status_order_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.11 on 2026-10-17 04:02
+
+from django.db import migrations, models
+
+
+def backfill_issued_count(apps, schema_editor):
+    Queue = apps.get_model('queues', 'Queue')
+    QueueHistory = apps.get_model('queues', 'QueueHistory')
+    QueueSequence = apps.get_model('queues', 'QueueSequence')
+    for sequence in QueueSequence.objects.all():
+        sequence.issued_count = (
+            Queue.objects.filter(service_id=sequence.service_id, date=sequence.date).count()
+            + QueueHistory.objects.filter(service_id=sequence.service_id, date=sequence.date).count()
+        )
+        sequence.save(update_fields=['issued_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('queues', '0009_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='queuesequence',
+            name='issued_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_issued_count, migrations.RunPython.noop),
+    ]
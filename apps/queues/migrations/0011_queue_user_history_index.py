@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-17 04:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('queues', '0010_queuesequence_issued_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='queue',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='queue_user_created_idx'),
+        ),
+    ]
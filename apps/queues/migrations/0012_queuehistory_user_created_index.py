@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-17 04:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('queues', '0011_queue_user_history_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='queuehistory',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='queue_history_user_created_idx'),
+        ),
+    ]
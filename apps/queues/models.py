@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
+from django.db.models import F, Q, Count, OuterRef, Subquery, Window
+from django.db.models.functions import Coalesce, RowNumber
 
 class Service(models.Model):
     SERVICE_TYPES = [
@@ -27,6 +29,72 @@ class Service(models.Model):
     
     def __str__(self):
         return self.name
+    
+    @property
+    def estimated_minutes(self):
+        """Learned average service time, or the configured estimate until one exists"""
+        stats = getattr(self, 'stats', None)
+        if stats and stats.completed_count:
+            return stats.avg_service_seconds / 60
+        return self.estimated_time
+
+class ServiceStats(models.Model):
+    """Running service-time average per service, updated on each completion"""
+    service = models.OneToOneField(Service, on_delete=models.CASCADE, related_name='stats')
+    avg_service_seconds = models.FloatField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'service_stats'
+    
+    def __str__(self):
+        return f"{self.service.name}: {self.avg_service_seconds / 60:.1f} min"
+
+class QueueQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(status__in=['waiting', 'serving'])
+    
+    def with_live_rank(self):
+        """
+        Annotate `live_rank`, each ticket's current place in its service-day.
+        
+        Computed with ROW_NUMBER() in the same query that loads the rows.
+        The window only sees rows that pass the queryset's filters, so call
+        this on `active()` before narrowing to a subset of tickets.
+        """
+        return self.annotate(live_rank=Window(
+            expression=RowNumber(),
+            partition_by=[F('service_id'), F('date')],
+            order_by=[F('priority_level').asc(), F('created_at').asc(), F('id').asc()],
+        ))
+    
+    def with_counted_rank(self):
+        """
+        Annotate `live_rank` by counting the active tickets ahead in the same service-day.
+        
+        Unlike `with_live_rank()` the count looks at the whole table, so the
+        rank stays right when the queryset is filtered, sliced or paged.
+        Each returned row costs one range count on the active-rank index,
+        which suits a bounded page rather than a full board.
+        """
+        ahead = Queue.objects.active().filter(
+            service_id=OuterRef('service_id'),
+            date=OuterRef('date'),
+        ).filter(
+            Q(priority_level__lt=OuterRef('priority_level'))
+            | Q(priority_level=OuterRef('priority_level'), created_at__lt=OuterRef('created_at'))
+            | Q(priority_level=OuterRef('priority_level'), created_at=OuterRef('created_at'), id__lt=OuterRef('id'))
+        ).order_by().values('service_id').annotate(count=Count('id')).values('count')
+        return self.annotate(live_rank=Coalesce(Subquery(ahead), 0) + 1)
+    
+    def live_ranks(self, service, date):
+        """Map of queue id to live rank for every active ticket of a service-day"""
+        return dict(
+            self.active().filter(service=service, date=date)
+            .with_live_rank()
+            .values_list('id', 'live_rank')
+        )
 
 class Queue(models.Model):
     STATUS_CHOICES = [
@@ -48,13 +116,30 @@ class Queue(models.Model):
     date = models.DateField(default=timezone.now)
     is_walkin = models.BooleanField(default=False, help_text='Walk-in customer without appointment')
     
+    objects = QueueQuerySet.as_manager()
+    
     class Meta:
         db_table = 'queue'
         ordering = ['priority_level', 'created_at']
         indexes = [
             models.Index(fields=['date', 'service']),
-            models.Index(fields=['status']),
-            models.Index(fields=['user']),
+            # Per-service positions, call-next and the per-service statistics
+            models.Index(fields=['service', 'date', 'status', 'priority_level'], name='queue_service_day_status_idx'),
+            # A citizen's tickets for today (take queue, dashboard)
+            models.Index(fields=['user', 'date', 'status'], name='queue_user_day_status_idx'),
+            # A citizen's ticket history, newest first
+            models.Index(fields=['user', '-created_at', '-id'], name='queue_user_created_idx'),
+            models.Index(fields=['is_walkin', 'status', 'created_at']),
+            # Only waiting/serving rows, in queue order: a small slice of the
+            # table that PostgreSQL can rank from without a sort
+            models.Index(
+                fields=['service', 'date', 'priority_level', 'created_at'],
+                condition=models.Q(status__in=['waiting', 'serving']),
+                name='queue_active_rank_idx',
+            ),
+            # The all-services live board; a partial index here would be
+            # skipped by SQLite, which cannot match it against bound IN params
+            models.Index(fields=['status', 'priority_level', 'created_at'], name='queue_status_order_idx'),
         ]
     
     def __str__(self):
@@ -73,3 +158,87 @@ class Queue(models.Model):
         elif self.priority_level == 2:
             return 'PWD'
         return 'Regular'
+
+class QueueSequence(models.Model):
+    """Last issued ticket number and tickets admitted (walk-ins included) per service and day"""
+    service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='sequences')
+    date = models.DateField()
+    last_number = models.PositiveIntegerField(default=0)
+    issued_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'queue_sequence'
+        constraints = [
+            models.UniqueConstraint(fields=['service', 'date'], name='unique_queue_sequence_per_day'),
+        ]
+    
+    def __str__(self):
+        return f"{self.service.code} {self.date}: {self.last_number}"
+
+class WalkinSequence(models.Model):
+    """Last issued walk-in number (W-NNN), a single row reset by admins"""
+    last_number = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'walkin_sequence'
+    
+    def __str__(self):
+        return f"W-{self.last_number:03d}"
+
+class QueueState(models.Model):
+    """Single-row version counter bumped on every Queue change, used for ETags"""
+    version = models.BigIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'queue_state'
+    
+    def __str__(self):
+        return f"Queue state v{self.version}"
+
+class QueueHistory(models.Model):
+    """Append-only archive of finished tickets, moved out of the queue table"""
+    queue_number = models.CharField(max_length=20)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='queue_history')
+    service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='queue_history')
+    priority_level = models.IntegerField(default=3)
+    status = models.CharField(max_length=20, choices=Queue.STATUS_CHOICES)
+    is_walkin = models.BooleanField(default=False)
+    date = models.DateField()
+    created_at = models.DateTimeField()
+    served_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'queue_history'
+        ordering = ['-completed_at']
+        indexes = [
+            models.Index(fields=['date', 'service']),
+            # A citizen's archived tickets, newest first
+            models.Index(fields=['user', '-created_at', '-id'], name='queue_history_user_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.queue_number} ({self.status})"
+    
+    @classmethod
+    def from_queue(cls, queue):
+        return cls(
+            queue_number=queue.queue_number,
+            user_id=queue.user_id,
+            service_id=queue.service_id,
+            priority_level=queue.priority_level,
+            status=queue.status,
+            is_walkin=queue.is_walkin,
+            date=queue.date,
+            created_at=queue.created_at,
+            served_at=queue.served_at,
+            completed_at=queue.completed_at,
+        )
+    
+    def get_waiting_time(self):
+        if self.completed_at and self.created_at:
+            return (self.completed_at - self.created_at).total_seconds() / 60
+        return None
+    
+    priority_label = Queue.priority_label
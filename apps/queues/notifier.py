@@ -0,0 +1,75 @@
+"""
+Queue Change Notifier
+Wakes streaming clients when a Queue row changes
+"""
+
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'queue_changes'
+
+
+class QueueChangeNotifier:
+    """
+    Process-wide change counter that streaming views can block on.
+
+    With the default 'local' backend only changes made in this process wake
+    waiters. The 'postgres' backend also publishes each change with
+    NOTIFY and runs a LISTEN thread, so every worker process sees changes
+    made by any other.
+    """
+
+    def __init__(self, backend='local'):
+        self.backend = backend
+        self.version = 0
+        self._condition = threading.Condition()
+        self._listener = None
+
+    def _bump(self):
+        with self._condition:
+            self.version += 1
+            self._condition.notify_all()
+
+    def notify(self):
+        """Record a committed change to the queue table"""
+        if self.backend == 'postgres':
+            # Delivered back to this process by its own listener
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, ''])
+        else:
+            self._bump()
+
+    def wait(self, since, timeout):
+        """Block until the version moves past `since` or `timeout` seconds pass"""
+        if self.backend == 'postgres':
+            self._ensure_listener()
+        with self._condition:
+            self._condition.wait_for(lambda: self.version != since, timeout=timeout)
+            return self.version
+
+    def _ensure_listener(self):
+        with self._condition:
+            if self._listener is not None and self._listener.is_alive():
+                return
+            self._listener = threading.Thread(target=self._listen, name='queue-change-listener', daemon=True)
+            self._listener.start()
+
+    def _listen(self):
+        try:
+            listen_connection = connection.get_new_connection(connection.get_connection_params())
+            listen_connection.autocommit = True
+            with listen_connection:
+                listen_connection.execute(f'LISTEN {CHANNEL}')
+                for _ in listen_connection.notifies():
+                    self._bump()
+        except Exception as e:
+            # The next waiter restarts the listener
+            logger.error(f'Queue change listener stopped: {str(e)}')
+
+
+queue_notifier = QueueChangeNotifier(getattr(settings, 'QUEUE_CHANGE_NOTIFIER', 'local'))
@@ -0,0 +1,9 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Queue
+from .utils import mark_queue_changed
+
+@receiver(post_save, sender=Queue)
+@receiver(post_delete, sender=Queue)
+def notify_queue_change(sender, **kwargs):
+    mark_queue_changed()
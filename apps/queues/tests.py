@@ -1,4 +1,766 @@
-from django.test import TestCase
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import views
+from .models import Queue, QueueHistory, QueueSequence, Service, ServiceStats, WalkinSequence
+from .utils import (
+    admit_ticket,
+    calculate_position,
+    claim_next_queue,
+    complete_queues,
+    estimate_wait_minutes,
+    generate_queue_number,
+    get_queue_statistics,
+    get_queue_state_version,
+    mark_queue_changed,
+    next_walkin_number,
+    record_service_times,
+    serve_next_queues,
+    with_remaining_capacity,
+)
+
+# Rows seeded for the query-plan tests. The default is enough for the
+# planners to prefer the indexes; set QUEUE_EXPLAIN_TEST_ROWS=1000000 to
+# check the plans at production scale.
+EXPLAIN_TEST_ROWS = int(os.getenv('QUEUE_EXPLAIN_TEST_ROWS', '20000'))
+EXPLAIN_TEST_DAYS = 400
+
+SEED_SQL = {
+    'sqlite': """
+        INSERT INTO queue (
+            user_id, service_id, queue_number, priority_level, status,
+            created_at, date, is_walkin
+        )
+        WITH RECURSIVE seq(n) AS (
+            SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < %(rows)s
+        )
+        SELECT
+            %(first_user)s + n %% %(users)s,
+            %(first_service)s + n %% %(services)s,
+            'SEED-' || n,
+            1 + n %% 3,
+            CASE
+                WHEN n %% %(days)s != 0 THEN CASE WHEN n %% 10 = 0 THEN 'cancelled' ELSE 'completed' END
+                WHEN n %% 7 = 0 THEN 'serving'
+                ELSE 'waiting'
+            END,
+            datetime(%(today)s, '-' || (n %% %(days)s) || ' days', '+' || (n %% 36000) || ' seconds'),
+            date(%(today)s, '-' || (n %% %(days)s) || ' days'),
+            n %% 5 = 0
+        FROM seq
+    """,
+    'postgresql': """
+        INSERT INTO queue (
+            user_id, service_id, queue_number, priority_level, status,
+            created_at, date, is_walkin
+        )
+        SELECT
+            %(first_user)s + n %% %(users)s,
+            %(first_service)s + n %% %(services)s,
+            'SEED-' || n,
+            1 + n %% 3,
+            CASE
+                WHEN n %% %(days)s != 0 THEN CASE WHEN n %% 10 = 0 THEN 'cancelled' ELSE 'completed' END
+                WHEN n %% 7 = 0 THEN 'serving'
+                ELSE 'waiting'
+            END,
+            %(today)s::date - (n %% %(days)s) + make_interval(secs => n %% 36000),
+            %(today)s::date - (n %% %(days)s),
+            n %% 5 = 0
+        FROM generate_series(1, %(rows)s) AS n
+    """,
+}
+
+# A bare table scan; scanning a (partial) index in order is fine
+FULL_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN queue\b(?! USING (COVERING )?INDEX)'),
+    'postgresql': re.compile(r'Seq Scan on queue\b'),
+}
+
+
+def create_service(**fields):
+    """Create the birth certificate service; keyword arguments override its fields"""
+    return Service.objects.create(**{
+        'name': 'Birth Certificate',
+        'code': 'BIRTH',
+        'description': 'Birth certificate requests',
+        'service_type': 'birth',
+        'estimated_time': 10,
+        **fields,
+    })
+
 
 class QueuesTestCase(TestCase):
     pass
+
+
+class ConcurrentQueueNumberingTestCase(TransactionTestCase):
+    def setUp(self):
+        self.service = create_service(max_daily_queue=100)
+        self.user = User.objects.create(username='citizen')
+
+    def take_ticket(self, _):
+        try:
+            queue_number = generate_queue_number(self.service)
+            Queue.objects.create(user=self.user, service=self.service, queue_number=queue_number)
+            return queue_number
+        finally:
+            connection.close()
+
+    def test_parallel_takes_get_unique_numbers(self):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            numbers = list(executor.map(self.take_ticket, range(40)))
+
+        prefix = f'BIRTH-{timezone.now().date().strftime("%d%m%y")}-'
+        self.assertEqual(sorted(numbers), [f'{prefix}{n:04d}' for n in range(1, 41)])
+        self.assertEqual(Queue.objects.count(), 40)
+
+    def test_numbers_are_not_reused_after_deletes(self):
+        first = self.take_ticket(None)
+        Queue.objects.filter(queue_number=first).delete()
+        self.assertTrue(self.take_ticket(None).endswith('-0002'))
+
+
+class ConcurrentCallNextTestCase(TransactionTestCase):
+    def setUp(self):
+        self.service = create_service()
+        user = User.objects.create(username='citizen')
+        for index in range(30):
+            Queue.objects.create(
+                user=user,
+                service=self.service,
+                queue_number=f'BIRTH-{index:04d}',
+                priority_level=1 + index % 3,
+            )
+
+    def in_thread(self, function):
+        def run(_):
+            try:
+                return function()
+            finally:
+                connection.close()
+        return run
+
+    def test_parallel_counters_each_get_a_different_ticket(self):
+        # Exactly one call per waiting ticket: any None would be spurious
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            claimed = list(executor.map(self.in_thread(lambda: claim_next_queue(self.service)), range(30)))
+
+        self.assertNotIn(None, claimed)
+        self.assertEqual(len({queue.id for queue in claimed}), 30)
+        self.assertEqual(Queue.objects.filter(status='serving').count(), 30)
+        self.assertIsNone(claim_next_queue(self.service))
+
+    def test_parallel_serve_next_batches_do_not_overlap(self):
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            batches = list(executor.map(self.in_thread(lambda: serve_next_queues(self.service, 5)), range(6)))
+
+        served = [queue_id for batch in batches for queue_id in batch]
+        self.assertEqual([len(batch) for batch in batches], [5] * 6)
+        self.assertEqual(len(set(served)), 30)
+
+    def test_claims_follow_queue_order(self):
+        first = claim_next_queue(self.service)
+        self.assertEqual((first.priority_level, first.queue_number), (1, 'BIRTH-0000'))
+        self.assertEqual(claim_next_queue(self.service).queue_number, 'BIRTH-0003')
+
+
+class CalculatePositionTestCase(TestCase):
+    def setUp(self):
+        self.service = create_service()
+        self.user = User.objects.create(username='citizen')
+        self.today = timezone.now().date()
+
+    def add_ticket(self, priority_level, status='waiting', **fields):
+        return Queue.objects.create(
+            user=self.user,
+            service=self.service,
+            queue_number=f'BIRTH-{Queue.objects.count() + 1:04d}',
+            priority_level=priority_level,
+            status=status,
+            **fields
+        )
+
+    def test_same_and_higher_priorities_are_ahead(self):
+        self.assertEqual(calculate_position(self.service, 3), 1)
+        self.add_ticket(3)
+        self.add_ticket(3, status='serving')
+        self.add_ticket(1)
+        self.add_ticket(2)
+
+        self.assertEqual(calculate_position(self.service, 1), 2)
+        self.assertEqual(calculate_position(self.service, 2), 3)
+        self.assertEqual(calculate_position(self.service, 3), 5)
+
+    def test_only_active_tickets_of_the_service_day_count(self):
+        other = Service.objects.create(
+            name='Business Permit',
+            code='PERMIT',
+            description='Business permits',
+            service_type='permit',
+            estimated_time=20,
+        )
+        self.add_ticket(1, status='cancelled')
+        self.add_ticket(1, status='completed')
+        self.add_ticket(1, date=self.today - timedelta(days=1))
+        Queue.objects.create(user=self.user, service=other, queue_number='PERMIT-0001', priority_level=1)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(calculate_position(self.service, 3), 1)
+
+
+class LiveRankTestCase(TestCase):
+    def setUp(self):
+        self.services = [
+            Service.objects.create(
+                name=f'Service {index}',
+                code=f'SVC{index}',
+                description='Test service',
+                service_type='other',
+                estimated_time=10,
+            )
+            for index in range(2)
+        ]
+        self.user = User.objects.create(username='citizen')
+        self.today = timezone.now().date()
+        base = timezone.now()
+        for index in range(24):
+            Queue.objects.create(
+                user=self.user,
+                service=self.services[index % 2],
+                queue_number=f'Q-{index:04d}',
+                priority_level=1 + index % 3,
+                status=['waiting', 'serving', 'waiting', 'completed', 'cancelled', 'waiting'][index % 6],
+                is_walkin=index % 4 == 0,
+            )
+        # Same timestamps for some tickets, so the id breaks the tie
+        for queue in Queue.objects.all():
+            Queue.objects.filter(id=queue.id).update(created_at=base + timedelta(seconds=queue.id // 3))
+
+    def expected_ranks(self):
+        """The original position rule: active tickets ahead in priority, then in arrival"""
+        ranks = {}
+        for queue in Queue.objects.active():
+            ranks[queue.id] = Queue.objects.active().filter(
+                service=queue.service,
+                date=queue.date,
+            ).filter(
+                Q(priority_level__lt=queue.priority_level)
+                | Q(priority_level=queue.priority_level, created_at__lt=queue.created_at)
+                | Q(priority_level=queue.priority_level, created_at=queue.created_at, id__lt=queue.id)
+            ).count() + 1
+        return ranks
+
+    def test_window_rank_over_the_active_board(self):
+        expected = self.expected_ranks()
+        ranks = dict(Queue.objects.active().with_live_rank().values_list('id', 'live_rank'))
+        self.assertEqual(ranks, expected)
+        self.assertEqual(Queue.objects.live_ranks(self.services[0], self.today), {
+            queue_id: rank for queue_id, rank in expected.items()
+            if Queue.objects.get(id=queue_id).service_id == self.services[0].id
+        })
+
+    def test_counted_rank_survives_filters_and_slices(self):
+        expected = self.expected_ranks()
+        walkins = Queue.objects.active().filter(is_walkin=True).with_counted_rank()
+        self.assertEqual(
+            dict(walkins.values_list('id', 'live_rank')),
+            {queue_id: expected[queue_id] for queue_id in walkins.values_list('id', flat=True)}
+        )
+        page = Queue.objects.active().with_counted_rank().order_by('priority_level', 'created_at', 'id')[5:9]
+        self.assertEqual([queue.live_rank for queue in page], [expected[queue.id] for queue in page])
+
+
+class ServiceTimeTestCase(TestCase):
+    def setUp(self):
+        self.service = create_service()
+        self.user = User.objects.create(username='citizen')
+
+    def served_for(self, *minutes):
+        now = timezone.now()
+        return [
+            Queue(service=self.service, served_at=now - timedelta(minutes=sample), completed_at=now)
+            for sample in minutes
+        ]
+
+    def test_first_sample_seeds_the_average(self):
+        self.assertEqual(self.service.estimated_minutes, 10)
+
+        record_service_times(self.served_for(4))
+
+        stats = ServiceStats.objects.get(service=self.service)
+        self.assertEqual(stats.completed_count, 1)
+        self.assertAlmostEqual(stats.avg_service_seconds, 240)
+        self.assertAlmostEqual(Service.objects.get(id=self.service.id).estimated_minutes, 4)
+
+    def test_batches_fold_like_single_completions(self):
+        record_service_times(self.served_for(4))
+        record_service_times(self.served_for(9))
+        record_service_times(self.served_for(2))
+        one_at_a_time = ServiceStats.objects.get(service=self.service).avg_service_seconds
+
+        # An existing row with no samples takes the fresh average in one UPDATE
+        ServiceStats.objects.update(avg_service_seconds=0, completed_count=0)
+        with self.assertNumQueries(1):
+            record_service_times(self.served_for(4, 9, 2))
+        batched = ServiceStats.objects.get(service=self.service)
+
+        # 4 min, then 0.8 * 4 + 0.2 * 9 = 5 min, then 0.8 * 5 + 0.2 * 2 = 4.4 min
+        self.assertAlmostEqual(one_at_a_time, 264)
+        self.assertAlmostEqual(batched.avg_service_seconds, one_at_a_time)
+        self.assertEqual(batched.completed_count, 3)
+
+    def test_unusable_samples_are_ignored(self):
+        never_served = Queue(service=self.service, completed_at=timezone.now())
+        with self.assertNumQueries(0):
+            record_service_times([never_served] + self.served_for(-1))
+        self.assertFalse(ServiceStats.objects.exists())
+
+    def test_detail_page_shows_eta_from_people_ahead(self):
+        ServiceStats.objects.create(service=self.service, avg_service_seconds=300, completed_count=5)
+        for index in range(3):
+            Queue.objects.create(user=self.user, service=self.service, queue_number=f'BIRTH-{index:04d}')
+        mine = Queue.objects.order_by('-id').first()
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse('queues:queue_detail', args=[mine.id]))
+
+        self.assertEqual(response.context['position'], 3)
+        self.assertEqual(response.context['eta_minutes'], 10)
+        self.assertIsNone(estimate_wait_minutes(self.service, None))
+
+
+class CompleteQueuesTestCase(TestCase):
+    def setUp(self):
+        self.service = create_service()
+        self.user = User.objects.create(username='citizen')
+        self.queue = Queue.objects.create(
+            user=self.user,
+            service=self.service,
+            queue_number='BIRTH-0001',
+            status='serving',
+            served_at=timezone.now() - timedelta(minutes=6),
+        )
+
+    def test_completion_moves_ticket_to_history(self):
+        self.assertEqual(complete_queues([self.queue]), 1)
+
+        self.assertFalse(Queue.objects.exists())
+        archived = QueueHistory.objects.get()
+        self.assertEqual(archived.queue_number, 'BIRTH-0001')
+        self.assertEqual(archived.user, self.user)
+        self.assertEqual(archived.status, 'completed')
+        self.assertEqual(archived.served_at, self.queue.served_at)
+        self.assertIsNotNone(archived.completed_at)
+
+        stats = ServiceStats.objects.get(service=self.service)
+        self.assertEqual(stats.completed_count, 1)
+        self.assertAlmostEqual(stats.avg_service_seconds, 360, delta=1)
+
+    def test_ticket_completed_twice_is_archived_once(self):
+        stale = Queue.objects.get(id=self.queue.id)
+
+        self.assertEqual(complete_queues([self.queue]), 1)
+        self.assertEqual(complete_queues([stale]), 0)
+
+        self.assertEqual(QueueHistory.objects.count(), 1)
+        self.assertEqual(ServiceStats.objects.get(service=self.service).completed_count, 1)
+
+    def test_failed_archive_leaves_ticket_and_stats_untouched(self):
+        with mock.patch.object(QueueHistory.objects, 'bulk_create', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                complete_queues([self.queue])
+
+        self.assertEqual(Queue.objects.get().status, 'serving')
+        self.assertFalse(QueueHistory.objects.exists())
+        self.assertFalse(ServiceStats.objects.exists())
+
+
+class RolloverQueuesTestCase(TestCase):
+    def setUp(self):
+        self.service = create_service()
+        self.user = User.objects.create(username='citizen')
+        self.today = timezone.now().date()
+        self.yesterday = self.today - timedelta(days=1)
+
+    def ticket(self, number, date, status='waiting', **fields):
+        return Queue.objects.create(
+            user=self.user,
+            service=self.service,
+            queue_number=number,
+            status=status,
+            date=date,
+            **fields
+        )
+
+    def rollover(self, *args):
+        out = StringIO()
+        call_command('rollover_queues', *args, stdout=out)
+        return out.getvalue()
+
+    def test_stale_tickets_are_closed_and_archived(self):
+        self.ticket('BIRTH-0001', self.yesterday)
+        self.ticket('BIRTH-0002', self.yesterday, 'serving', served_at=timezone.now() - timedelta(hours=12))
+        self.ticket('BIRTH-0003', self.yesterday, 'completed', completed_at=timezone.now() - timedelta(hours=11))
+        self.ticket('BIRTH-0004', self.today)
+
+        self.rollover()
+
+        self.assertEqual(list(Queue.objects.values_list('queue_number', flat=True)), ['BIRTH-0004'])
+        archived = {row.queue_number: row for row in QueueHistory.objects.all()}
+        self.assertEqual(archived['BIRTH-0001'].status, 'cancelled')
+        self.assertIsNone(archived['BIRTH-0001'].completed_at)
+        self.assertEqual(archived['BIRTH-0002'].status, 'completed')
+        self.assertIsNotNone(archived['BIRTH-0002'].completed_at)
+        self.assertEqual(archived['BIRTH-0003'].status, 'completed')
+        # A ticket left at the counter overnight is no service-time sample
+        self.assertFalse(ServiceStats.objects.exists())
+
+    def test_dry_run_changes_nothing(self):
+        self.ticket('BIRTH-0001', self.yesterday)
+
+        output = self.rollover('--dry-run')
+
+        self.assertIn(f'1 tickets dated before {self.today} would be rolled over', output)
+        self.assertEqual(Queue.objects.count(), 1)
+        self.assertFalse(QueueHistory.objects.exists())
+
+    def test_tickets_move_in_chunks(self):
+        for index in range(5):
+            self.ticket(f'BIRTH-{index:04d}', self.yesterday)
+
+        output = self.rollover('--chunk-size', '2')
+
+        progress = [line.strip() for line in output.splitlines() if line.strip().startswith('archived')]
+        self.assertEqual([line.split(' (')[0] for line in progress], [
+            'archived 2 tickets', 'archived 4 tickets', 'archived 5 tickets',
+        ])
+        self.assertEqual(QueueHistory.objects.count(), 5)
+
+    def test_before_limits_the_days_rolled_over(self):
+        self.ticket('BIRTH-0001', self.today - timedelta(days=3))
+        self.ticket('BIRTH-0002', self.yesterday)
+
+        self.rollover('--before', (self.today - timedelta(days=2)).isoformat())
+
+        self.assertEqual(list(Queue.objects.values_list('queue_number', flat=True)), ['BIRTH-0002'])
+
+    def test_invalid_options_are_rejected(self):
+        with self.assertRaisesMessage(CommandError, 'Invalid --before date: 17/10/2026'):
+            self.rollover('--before', '17/10/2026')
+        with self.assertRaisesMessage(CommandError, '--chunk-size must be at least 1'):
+            self.rollover('--chunk-size', '0')
+        tomorrow = self.today + timedelta(days=1)
+        with self.assertRaisesMessage(CommandError, f'--before cannot be after today: {tomorrow}'):
+            self.rollover('--before', tomorrow.isoformat())
+
+    def test_numbering_continues_after_archived_tickets(self):
+        first = generate_queue_number(self.service)
+        queue = self.ticket(first, self.today, 'serving')
+        complete_queues([queue])
+        # The sequence row is gone, e.g. cleared by a rollover
+        QueueSequence.objects.all().delete()
+
+        second = generate_queue_number(self.service)
+
+        self.assertEqual(int(first.rsplit('-', 1)[1]) + 1, int(second.rsplit('-', 1)[1]))
+
+    def test_old_daily_counters_are_cleared(self):
+        QueueSequence.objects.create(service=self.service, date=self.yesterday, last_number=7, issued_count=7)
+        QueueSequence.objects.create(service=self.service, date=self.today, last_number=2, issued_count=2)
+
+        self.rollover()
+
+        self.assertEqual(list(QueueSequence.objects.values_list('date', flat=True)), [self.today])
+
+    def test_walkin_numbering_resets_once_no_walkins_are_left(self):
+        for _ in range(3):
+            next_walkin_number()
+        self.ticket('W-003', self.yesterday, is_walkin=True)
+        self.ticket('W-004', self.today, is_walkin=True)
+
+        self.rollover()
+        self.assertEqual(WalkinSequence.objects.get().last_number, 3)
+
+        Queue.objects.filter(is_walkin=True).delete()
+        self.rollover()
+        self.assertEqual(WalkinSequence.objects.get().last_number, 0)
+
+
+class QueueHistoryPageTestCase(TestCase):
+    def setUp(self):
+        self.service = create_service()
+        self.user = User.objects.create(username='citizen')
+        self.client.force_login(self.user)
+
+    def test_pages_cover_live_and_archived_tickets_newest_first(self):
+        start = timezone.now() - timedelta(days=1)
+        expected = []
+        for index in range(7):
+            # Pairs of tickets share a timestamp, one live and one archived
+            created_at = start + timedelta(minutes=index // 2)
+            number = f'BIRTH-{index:04d}'
+            if index % 2:
+                QueueHistory.objects.create(
+                    user=self.user, service=self.service, queue_number=number,
+                    status='completed', date=created_at.date(), created_at=created_at,
+                )
+            else:
+                queue = Queue.objects.create(user=self.user, service=self.service, queue_number=number)
+                Queue.objects.filter(id=queue.id).update(created_at=created_at)
+            expected.append(number)
+        QueueHistory.objects.create(
+            user=User.objects.create(username='other'), service=self.service, queue_number='BIRTH-0099',
+            status='completed', date=start.date(), created_at=start,
+        )
+
+        with mock.patch.object(views, 'HISTORY_PAGE_SIZE', 3):
+            response = self.client.get(reverse('queues:queue_list'))
+            numbers = [queue.queue_number for queue in response.context['queues']]
+            cursor = response.context['page'].next_cursor
+            while cursor:
+                page = self.client.get(reverse('queues:queue_list_api'), {'after': cursor}).json()
+                numbers += re.findall(r'<strong>(BIRTH-\d+)</strong>', page['html'])
+                cursor = page['next_cursor']
+
+        # Newest first; a live ticket comes before an archived one created at the same moment
+        self.assertEqual(numbers, ['BIRTH-0006', 'BIRTH-0004', 'BIRTH-0005', 'BIRTH-0002', 'BIRTH-0003',
+                                   'BIRTH-0000', 'BIRTH-0001'])
+        self.assertEqual(sorted(numbers), expected)
+
+
+class QueueStatisticsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='citizen')
+        self.birth = create_service()
+        self.clearance = create_service(
+            name='Barangay Clearance', code='CLEAR', description='Clearance requests', service_type='clearance',
+        )
+        today = timezone.now().date()
+        with self.captureOnCommitCallbacks(execute=True):
+            for number, service, status in [
+                ('BIRTH-0001', self.birth, 'waiting'),
+                ('BIRTH-0002', self.birth, 'waiting'),
+                ('BIRTH-0003', self.birth, 'serving'),
+                ('CLEAR-0001', self.clearance, 'waiting'),
+            ]:
+                Queue.objects.create(user=self.user, service=service, queue_number=number, status=status)
+        for number, service, status, day in [
+            ('BIRTH-0004', self.birth, 'completed', today),
+            ('BIRTH-0005', self.birth, 'completed', today),
+            ('CLEAR-0002', self.clearance, 'cancelled', today),
+            ('CLEAR-0003', self.clearance, 'completed', today - timedelta(days=1)),
+        ]:
+            QueueHistory.objects.create(
+                user=self.user, service=service, queue_number=number,
+                status=status, date=day, created_at=timezone.now(),
+            )
+
+    def test_counts_include_todays_archived_tickets(self):
+        self.assertEqual(get_queue_statistics(), {
+            'total_today': 7, 'waiting': 3, 'serving': 1, 'completed': 2, 'cancelled': 1,
+        })
+
+    def test_breakdown_by_service(self):
+        services = get_queue_statistics(by_service=True)['services']
+
+        self.assertEqual(
+            [(row['service__name'], row['total_today'], row['waiting'], row['completed'], row['cancelled'])
+             for row in services],
+            [('Barangay Clearance', 2, 1, 0, 1), ('Birth Certificate', 5, 2, 2, 0)]
+        )
+
+    def test_repeat_reads_come_from_cache(self):
+        get_queue_statistics()
+
+        # Only the queue-state version is read
+        with self.assertNumQueries(1):
+            stats = get_queue_statistics()
+        self.assertEqual(stats['waiting'], 3)
+
+    def test_queue_change_invalidates_cached_counts(self):
+        get_queue_statistics()
+        # A write that does not publish a change is not seen
+        Queue.objects.filter(queue_number='CLEAR-0001').update(status='serving')
+        self.assertEqual(get_queue_statistics()['waiting'], 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_queue_changed()
+
+        stats = get_queue_statistics()
+        self.assertEqual((stats['waiting'], stats['serving']), (2, 2))
+
+
+class QueueChangePublishTestCase(TestCase):
+    def test_changes_in_one_transaction_publish_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                mark_queue_changed()
+                try:
+                    with transaction.atomic():
+                        mark_queue_changed()
+                        raise ValueError
+                except ValueError:
+                    pass
+                mark_queue_changed()
+
+        self.assertEqual(get_queue_state_version(), 1)
+
+    def test_change_after_a_rollback_is_published(self):
+        try:
+            with transaction.atomic():
+                mark_queue_changed()
+                raise ValueError
+        except ValueError:
+            pass
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                mark_queue_changed()
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_queue_changed()
+
+        self.assertEqual(get_queue_state_version(), 2)
+
+
+class DailyCapacityTestCase(TestCase):
+    def setUp(self):
+        self.service = create_service(max_daily_queue=3)
+        self.today = timezone.now().date()
+
+    def test_full_service_is_rejected_without_counting(self):
+        self.assertEqual(admit_ticket(self.service, self.today), 1)
+        self.assertEqual(admit_ticket(self.service, self.today, numbered=False), 1)
+        self.assertEqual(admit_ticket(self.service, self.today), 2)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertIsNone(admit_ticket(self.service, self.today))
+        self.assertFalse([query for query in queries if 'COUNT(' in query['sql']])
+        self.assertIsNone(generate_queue_number(self.service))
+
+    def test_remaining_capacity(self):
+        other = Service.objects.create(
+            name='Business Permit',
+            code='PERMIT',
+            description='Business permits',
+            service_type='permit',
+            estimated_time=20,
+            max_daily_queue=5,
+        )
+        admit_ticket(self.service, self.today)
+        admit_ticket(self.service, self.today)
+
+        with self.assertNumQueries(1):
+            remaining = dict(with_remaining_capacity(Service.objects.all()).values_list('code', 'remaining_today'))
+        self.assertEqual(remaining, {'BIRTH': 1, 'PERMIT': 5})
+
+    def test_existing_tickets_seed_the_count(self):
+        user = User.objects.create(username='citizen')
+        for number in range(1, 3):
+            Queue.objects.create(
+                user=user,
+                service=self.service,
+                queue_number=f'BIRTH-{self.today.strftime("%d%m%y")}-{number:04d}',
+                date=self.today,
+            )
+
+        self.assertEqual(admit_ticket(self.service, self.today), 3)
+        self.assertIsNone(admit_ticket(self.service, self.today))
+
+
+class HotQueryPlanTestCase(TestCase):
+    """Every hot Queue query must stay on an index over a large seeded table"""
+
+    @classmethod
+    def setUpTestData(cls):
+        if connection.vendor not in SEED_SQL:
+            return
+        cls.services = [
+            Service.objects.create(
+                name=f'Service {index}',
+                code=f'SVC{index}',
+                description='Seeded service',
+                service_type='other',
+                estimated_time=10,
+            )
+            for index in range(10)
+        ]
+        cls.users = User.objects.bulk_create([User(username=f'citizen{index}') for index in range(1000)])
+        cls.today = timezone.now().date()
+
+        with connection.cursor() as cursor:
+            cursor.execute(SEED_SQL[connection.vendor] % {
+                'rows': EXPLAIN_TEST_ROWS,
+                'days': EXPLAIN_TEST_DAYS,
+                'users': len(cls.users),
+                'first_user': cls.users[0].id,
+                'services': len(cls.services),
+                'first_service': cls.services[0].id,
+                'today': f"'{cls.today.isoformat()}'",
+            })
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        if connection.vendor not in SEED_SQL:
+            self.skipTest(f'No seed data for {connection.vendor}')
+        self.service = self.services[0]
+        self.user = self.users[0]
+
+    def assertUsesIndex(self, queryset):
+        plan = queryset.explain()
+        self.assertIsNone(
+            FULL_SCAN_PATTERNS[connection.vendor].search(plan),
+            f'Sequential scan of queue:\n{queryset.query}\n{plan}'
+        )
+
+    def test_position_and_rank_queries(self):
+        active_today = Queue.objects.active().filter(service=self.service, date=self.today)
+        self.assertUsesIndex(active_today.filter(priority_level__lte=2).values('id'))
+        self.assertUsesIndex(active_today.values_list('id', 'priority_level', 'created_at'))
+        self.assertUsesIndex(active_today.with_live_rank().values_list('id', 'live_rank'))
+
+    def test_call_next_query(self):
+        self.assertUsesIndex(
+            Queue.objects.filter(service=self.service, date=self.today, status='waiting')
+            .order_by('priority_level', 'created_at', 'id')[:1]
+        )
+
+    def test_citizen_queries(self):
+        self.assertUsesIndex(
+            Queue.objects.filter(user=self.user, status__in=['waiting', 'serving'], date=self.today)
+        )
+        self.assertUsesIndex(Queue.objects.filter(user=self.user, date=self.today))
+        self.assertUsesIndex(Queue.objects.filter(user=self.user).order_by('-created_at', '-id')[:26])
+
+    def test_board_queries(self):
+        self.assertUsesIndex(Queue.objects.active().order_by('priority_level', 'created_at'))
+        self.assertUsesIndex(
+            Queue.objects.active().filter(is_walkin=False, date=self.today)
+            .with_counted_rank().order_by('priority_level', 'created_at', 'id')[:51]
+        )
+        self.assertUsesIndex(
+            Queue.objects.filter(is_walkin=True, status__in=['waiting', 'serving']).order_by('created_at')[:20]
+        )
+
+    def test_statistics_query(self):
+        self.assertUsesIndex(
+            Queue.objects.filter(date=self.today)
+            .values('service_id')
+            .annotate(waiting=Count('id', filter=Q(status='waiting')))
+            .order_by()
+        )
@@ -8,6 +8,7 @@ urlpatterns = [
     path('take/', views.take_queue_view, name='take_queue'),
     path('detail/<int:queue_id>/', views.queue_detail_view, name='queue_detail'),
     path('list/', views.queue_list_view, name='queue_list'),
+    path('list/api/', views.queue_list_api, name='queue_list_api'),
     path('cancel/<int:queue_id>/', views.cancel_queue_view, name='cancel_queue'),
     
     # Service management
@@ -1,15 +1,182 @@
+import threading
+
 from django.utils import timezone
-from django.db.models import Count, Q, Max
-from .models import Queue
+from django.core.cache import cache
+from django.db import connection, transaction, IntegrityError
+from django.db.models import Count, Q, Max, F, Case, When, Value, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from .models import Queue, QueueSequence, WalkinSequence, ServiceStats, QueueState, QueueHistory
+from .notifier import queue_notifier
+
+WALKIN_SEQUENCE_ID = 1
+QUEUE_STATE_ID = 1
+
+QUEUE_STATISTICS_FIELDS = ('total_today', 'waiting', 'serving', 'completed', 'cancelled')
+QUEUE_STATISTICS_CACHE_SECONDS = 60
+
+# Weight of the newest completion in the running service-time average
+SERVICE_TIME_SMOOTHING = 0.2
+
+def _seed_sequence(service, date):
+    """Highest number already issued for a service-day, used once when its sequence row is created"""
+    # Archived tickets keep their numbers, so both tables count
+    prefix = _queue_number_prefix(service, date)
+    last_queue_numbers = [
+        model.objects.filter(
+            service=service,
+            date=date,
+            queue_number__startswith=prefix
+        ).aggregate(last=Max('queue_number'))['last']
+        for model in (Queue, QueueHistory)
+    ]
+    
+    last_number = 0
+    for last_queue_number in last_queue_numbers:
+        try:
+            last_number = max(last_number, int(last_queue_number.rsplit('-', 1)[1]))
+        except (AttributeError, IndexError, ValueError):
+            pass
+    return last_number
+
+def _increment_sequence(sequence, seed, **fields):
+    """
+    Atomically bump the single row matched by `sequence` and return its new value.
+    
+    The UPDATE takes the row lock before anything is read, so concurrent
+    callers are serialized on the sequence row instead of racing on a
+    COUNT of the queue table. `seed` is only called when the row does not
+    exist yet.
+    """
+    with transaction.atomic():
+        if not sequence.update(last_number=F('last_number') + 1):
+            try:
+                with transaction.atomic():
+                    sequence.model.objects.create(last_number=seed() + 1, **fields)
+            except IntegrityError:
+                # Another request created the row first
+                sequence.update(last_number=F('last_number') + 1)
+        return sequence.values_list('last_number', flat=True).get()
+
+def _issued_count(service, date):
+    """Tickets already issued for a service-day, used once when its sequence row is created"""
+    return (
+        Queue.objects.filter(service=service, date=date).count()
+        + QueueHistory.objects.filter(service=service, date=date).count()
+    )
+
+def _queue_number_prefix(service, date):
+    return f"{service.code.upper()}-{date.strftime('%d%m%y')}-"
+
+def admit_ticket(service, date, numbered=True):
+    """
+    Take one of the service's `max_daily_queue` slots for a day.
+    
+    The capacity check is the WHERE clause of the same UPDATE that bumps
+    the service-day sequence row, so admission is atomic and a full
+    service is turned away without counting the queue table. Walk-ins are
+    admitted with `numbered=False`: they use up a slot but take their
+    number from the walk-in sequence.
+    
+    Returns the service-day's last ticket number after admission, or None
+    when the service is full.
+    """
+    sequence = QueueSequence.objects.filter(service=service, date=date)
+    open_sequence = sequence.filter(issued_count__lt=service.max_daily_queue)
+    updates = {'issued_count': F('issued_count') + 1}
+    if numbered:
+        updates['last_number'] = F('last_number') + 1
+    
+    with transaction.atomic():
+        if not open_sequence.update(**updates):
+            if sequence.exists():
+                return None
+            issued_count = _issued_count(service, date)
+            admitted = issued_count < service.max_daily_queue
+            try:
+                with transaction.atomic():
+                    QueueSequence.objects.create(
+                        service=service,
+                        date=date,
+                        issued_count=issued_count + admitted,
+                        last_number=_seed_sequence(service, date) + (numbered and admitted)
+                    )
+            except IntegrityError:
+                # Another request created the row first
+                admitted = bool(open_sequence.update(**updates))
+            if not admitted:
+                return None
+        return sequence.values_list('last_number', flat=True).get()
+
+def with_remaining_capacity(services, date=None):
+    """Annotate `remaining_today`, the tickets each service can still issue, from its sequence row"""
+    date = date or timezone.now().date()
+    issued_count = QueueSequence.objects.filter(service=OuterRef('pk'), date=date).values('issued_count')
+    return services.annotate(
+        remaining_today=Greatest(F('max_daily_queue') - Coalesce(Subquery(issued_count), 0), 0)
+    )
+
+def next_walkin_number():
+    """Allocate the next walk-in number"""
+    return _increment_sequence(
+        WalkinSequence.objects.filter(pk=WALKIN_SEQUENCE_ID),
+        lambda: 0,
+        pk=WALKIN_SEQUENCE_ID
+    )
+
+def reset_walkin_sequence():
+    """Restart walk-in numbering at W-001"""
+    WalkinSequence.objects.filter(pk=WALKIN_SEQUENCE_ID).update(last_number=0)
+
+def get_queue_state_version():
+    """Current queue-state version, read from its own one-row table"""
+    return QueueState.objects.filter(pk=QUEUE_STATE_ID).values_list('version', flat=True).first() or 0
+
+def bump_queue_state_version():
+    if not QueueState.objects.filter(pk=QUEUE_STATE_ID).update(version=F('version') + 1):
+        QueueState.objects.get_or_create(pk=QUEUE_STATE_ID, defaults={'version': 1})
+
+def _publish_queue_change():
+    bump_queue_state_version()
+    queue_notifier.notify()
+
+class _QueueChangeBatch:
+    """Changes published together by whichever of their on_commit callbacks runs first"""
+    
+    def __init__(self):
+        self.published = False
+    
+    def publish(self):
+        if self.published:
+            return
+        self.published = True
+        _publish_queue_change()
+
+# Batch collecting this thread's (and so this connection's) unpublished changes
+_queue_changes = threading.local()
+
+def mark_queue_changed():
+    """
+    Record that queue rows changed, once the current transaction commits.
+    
+    Called by the Queue signals; code that writes with update() or
+    bulk_update() bypasses those and must call this itself. Any number of
+    changes inside one transaction publish a single version bump. Changes
+    whose transaction or savepoint rolls back lose their callbacks, and
+    the batch they joined is picked up by the next change instead.
+    """
+    batch = getattr(_queue_changes, 'batch', None)
+    if batch is None or batch.published:
+        batch = _queue_changes.batch = _QueueChangeBatch()
+    transaction.on_commit(batch.publish)
 
 def generate_queue_number(service):
+    """Admit a ticket for today and return its number, or None when the service is full"""
     today = timezone.now().date()
-    today_count = Queue.objects.filter(
-        service=service,
-        date=today
-    ).count() + 1
+    number = admit_ticket(service, today)
+    if number is None:
+        return None
     
-    queue_number = f"{service.code.upper()}-{today.strftime('%d%m%y')}-{today_count:04d}"
+    queue_number = f"{_queue_number_prefix(service, today)}{number:04d}"
     return queue_number
 
 def assign_priority(user_profile):
@@ -17,33 +184,263 @@ def assign_priority(user_profile):
     return user_profile.get_priority_level()
 
 def calculate_position(service, priority_level):
-    """Calculate position in queue based on priority and service"""
+    """
+    Position a ticket with this priority would get if issued now.
+    
+    Everyone active today at the same or a higher priority is ahead of it.
+    One COUNT answered from the (service, date, status, priority_level)
+    index, so every worker process sees the same answer.
+    """
     today = timezone.now().date()
+    return Queue.objects.active().filter(
+        service=service,
+        date=today,
+        priority_level__lte=priority_level
+    ).count() + 1
+
+def lock_queues(queryset):
+    """
+    Lock the queue rows of `queryset` for the rest of the transaction.
+    
+    SQLite has no row locks, so there an empty UPDATE takes the database
+    write lock instead and other writers wait for this transaction.
+    """
+    if connection.vendor == 'sqlite':
+        Queue.objects.filter(pk=None).update(status=F('status'))
+        return queryset
+    return queryset.select_for_update()
+
+def _lock_claim_candidates(waiting):
+    """
+    Make reading and claiming `waiting` tickets safe against other counters.
+    
+    Databases with SKIP LOCKED (PostgreSQL) let each counter lock different
+    rows without waiting on the others. SQLite starts transactions deferred
+    and has no row locks, so an empty UPDATE takes its database write lock
+    up front: claims then run one at a time and never read a ticket another
+    counter is about to take. Call inside the claiming transaction.
+    """
+    if connection.features.has_select_for_update_skip_locked:
+        return waiting.select_for_update(skip_locked=True)
+    return lock_queues(waiting)
+
+def claim_next_queue(service):
+    """
+    Atomically move the highest-priority waiting ticket of a service to serving.
     
-    # Count people with higher priority ahead
-    ahead_count = Queue.objects.filter(
+    Returns the claimed Queue, or None when nobody is waiting.
+    """
+    today = timezone.now().date()
+    waiting = Queue.objects.filter(
         service=service,
         date=today,
-        status__in=['waiting', 'serving'],
-        priority_level__lt=priority_level
-    ).count()
+        status='waiting'
+    ).order_by('priority_level', 'created_at', 'id')
     
-    # Count people with same priority ahead
-    same_priority = Queue.objects.filter(
+    with transaction.atomic():
+        queue = _lock_claim_candidates(waiting).first()
+        if queue is None:
+            return None
+        queue.status = 'serving'
+        queue.served_at = timezone.now()
+        queue.save(update_fields=['status', 'served_at'])
+        return queue
+
+def serve_next_queues(service, count):
+    """
+    Move up to `count` of a service's next waiting tickets to serving at once.
+    
+    The candidates are read in queue order under the same locking as
+    claim_next_queue and moved with one UPDATE, so two counters never
+    serve the same ticket.
+    
+    Returns the ids of the tickets now being served.
+    """
+    today = timezone.now().date()
+    waiting = Queue.objects.filter(
         service=service,
         date=today,
-        status__in=['waiting', 'serving'],
-        priority_level=priority_level
-    ).count()
+        status='waiting'
+    ).order_by('priority_level', 'created_at', 'id')
     
-    return ahead_count + same_priority + 1
+    with transaction.atomic():
+        queue_ids = list(_lock_claim_candidates(waiting).values_list('id', flat=True)[:count])
+        if not queue_ids:
+            return []
+        Queue.objects.filter(id__in=queue_ids).update(status='serving', served_at=timezone.now())
+        # update() skips the Queue signals
+        mark_queue_changed()
+        return queue_ids
 
-def get_queue_statistics():
-    """Get overall queue statistics"""
+def cancel_queues(queue_ids):
+    """
+    Cancel active tickets with a single UPDATE
+    
+    Args:
+        queue_ids: IDs of waiting or serving tickets
+        
+    Returns:
+        int: Number of tickets cancelled
+    """
+    cancelled_count = Queue.objects.active().filter(id__in=queue_ids).update(status='cancelled')
+    if cancelled_count:
+        # update() skips the Queue signals
+        mark_queue_changed()
+    return cancelled_count
+
+def record_service_times(queues):
+    """
+    Fold completed tickets' serving times into their services' running averages.
+    
+    The average is an exponentially weighted moving average. All samples for
+    a service are folded in Python and applied with a single UPDATE, so the
+    cost is one statement per service regardless of history or batch size.
+    """
+    samples = {}
+    for queue in queues:
+        if not queue.served_at or not queue.completed_at:
+            continue
+        seconds = (queue.completed_at - queue.served_at).total_seconds()
+        if seconds >= 0:
+            samples.setdefault(queue.service_id, []).append(seconds)
+    
+    alpha = SERVICE_TIME_SMOOTHING
+    for service_id, seconds in samples.items():
+        # avg after k samples = avg * (1 - alpha)^k + tail
+        tail = 0
+        for sample in seconds:
+            tail = tail * (1 - alpha) + alpha * sample
+        # With no prior average the first sample seeds it instead
+        fresh = seconds[0]
+        for sample in seconds[1:]:
+            fresh = fresh * (1 - alpha) + alpha * sample
+        
+        stats = ServiceStats.objects.filter(service_id=service_id)
+        changes = {
+            'avg_service_seconds': Case(
+                When(completed_count=0, then=Value(fresh)),
+                default=F('avg_service_seconds') * (1 - alpha) ** len(seconds) + tail,
+            ),
+            'completed_count': F('completed_count') + len(seconds),
+            'updated_at': timezone.now(),
+        }
+        if not stats.update(**changes):
+            try:
+                with transaction.atomic():
+                    ServiceStats.objects.create(
+                        service_id=service_id,
+                        avg_service_seconds=fresh,
+                        completed_count=len(seconds)
+                    )
+            except IntegrityError:
+                # Another completion created the row first
+                stats.update(**changes)
+
+def archive_queues(queues):
+    """
+    Move finished tickets from the queue table into queue_history.
+    
+    The rows are locked and re-checked first, so a ticket that another
+    request archived in the meantime is skipped rather than archived twice.
+    Then one bulk INSERT and one DELETE inside a single transaction, so a
+    ticket is never in both tables or in neither.
+    
+    Args:
+        queues: Queue objects already carrying their final status
+        
+    Returns:
+        int: Number of tickets archived
+    """
+    queues = list(queues)
+    if not queues:
+        return 0
+    with transaction.atomic():
+        present = set(
+            lock_queues(Queue.objects.filter(id__in=[queue.id for queue in queues])).values_list('id', flat=True)
+        )
+        queues = [queue for queue in queues if queue.id in present]
+        if queues:
+            QueueHistory.objects.bulk_create([QueueHistory.from_queue(queue) for queue in queues])
+            Queue.objects.filter(id__in=[queue.id for queue in queues]).delete()
+    return len(queues)
+
+def complete_queues(queues):
+    """
+    Mark tickets completed, learn their service times and archive them
+    
+    Tickets are re-read under a row lock, so one completed twice (a double
+    submit, two counters, a stale page) is archived and timed only once.
+    
+    Args:
+        queues: Queue objects being completed
+        
+    Returns:
+        int: Number of tickets completed
+    """
+    queue_ids = [queue.id for queue in queues]
+    completed_at = timezone.now()
+    with transaction.atomic():
+        queues = list(lock_queues(Queue.objects.filter(id__in=queue_ids)).order_by('id'))
+        for queue in queues:
+            queue.status = 'completed'
+            queue.completed_at = completed_at
+        record_service_times(queues)
+        return archive_queues(queues)
+
+def estimate_wait_minutes(service, position):
+    """Minutes until a ticket at `position` is called, from the learned service time"""
+    if not position:
+        return None
+    return round((position - 1) * service.estimated_minutes)
+
+def _status_counts(queryset):
+    """Per-service conditional counts for one table, keyed by service id"""
+    rows = (
+        queryset.values('service_id', 'service__name')
+        .annotate(
+            total_today=Count('id'),
+            waiting=Count('id', filter=Q(status='waiting')),
+            serving=Count('id', filter=Q(status='serving')),
+            completed=Count('id', filter=Q(status='completed')),
+            cancelled=Count('id', filter=Q(status='cancelled')),
+        )
+        .order_by()
+    )
+    return {row['service_id']: row for row in rows}
+
+def get_queue_statistics(by_service=False):
+    """
+    Get overall queue statistics
+    
+    One grouped query with conditional counts per service over the live
+    queue table, and one over today's archived tickets; the overall totals
+    are summed from those rows. Results are cached under the current
+    queue-state version, so any Queue change invalidates them.
+    
+    Args:
+        by_service: Also return the per-service breakdown under 'services'
+    """
     today = timezone.now().date()
-    return {
-        'total_today': Queue.objects.filter(date=today).count(),
-        'waiting': Queue.objects.filter(date=today, status='waiting').count(),
-        'serving': Queue.objects.filter(date=today, status='serving').count(),
-        'completed': Queue.objects.filter(date=today, status='completed').count(),
-    }
+    cache_key = f"queue_statistics:{today.isoformat()}:{get_queue_state_version()}"
+    stats = cache.get(cache_key)
+    
+    if stats is None:
+        services = _status_counts(Queue.objects.filter(date=today))
+        for service_id, archived in _status_counts(QueueHistory.objects.filter(date=today)).items():
+            if service_id not in services:
+                services[service_id] = archived
+                continue
+            for field in QUEUE_STATISTICS_FIELDS:
+                services[service_id][field] += archived[field]
+        services = sorted(services.values(), key=lambda row: row['service__name'])
+        
+        stats = {
+            field: sum(row[field] for row in services)
+            for field in QUEUE_STATISTICS_FIELDS
+        }
+        stats['services'] = services
+        cache.set(cache_key, stats, QUEUE_STATISTICS_CACHE_SECONDS)
+    
+    if by_service:
+        return stats
+    return {field: stats[field] for field in QUEUE_STATISTICS_FIELDS}
@@ -1,11 +1,16 @@
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import JsonResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
 from django.contrib import messages
 from django.utils import timezone
+from django.db import transaction
 from django.db.models import Q
-from .models import Queue, Service
+from .models import Queue, QueueHistory, Service
 from .forms import QueueCreationForm, ServiceCreationForm
-from .utils import generate_queue_number, assign_priority, calculate_position
+from .utils import generate_queue_number, assign_priority, calculate_position, estimate_wait_minutes
+from config.pagination import keyset_paginate_merged
 
 @login_required
 def dashboard_view(request):
@@ -27,10 +32,15 @@ def dashboard_view(request):
     # Fetch queues separately
     user_queues = []
     active_queue = None
+    active_position = None
+    active_eta = None
     try:
         today = timezone.now().date()
         user_queues = Queue.objects.filter(user=request.user, date=today)
-        active_queue = user_queues.filter(status__in=['waiting', 'serving']).first()
+        active_queue = user_queues.filter(status__in=['waiting', 'serving']).select_related('service__stats').first()
+        if active_queue:
+            active_position = Queue.objects.live_ranks(active_queue.service_id, active_queue.date).get(active_queue.id)
+            active_eta = estimate_wait_minutes(active_queue.service, active_position)
     except Exception as e:
         logger.error(f'Queue fetch error for user {request.user.id}: {str(e)}')
         user_queues = []
@@ -57,6 +67,8 @@ def dashboard_view(request):
     context = {
         'user_queues': user_queues,
         'active_queue': active_queue,
+        'active_position': active_position,
+        'active_eta': active_eta,
         'user_appointments': user_appointments,
         'profile': profile,
         'error': has_error,
@@ -89,17 +101,23 @@ def take_queue_view(request):
                 
                 # Get priority from user profile
                 priority_level = profile.get_priority_level()
-                queue_number = generate_queue_number(service)
-                position = calculate_position(service, priority_level)
                 
-                queue = Queue.objects.create(
-                    user=request.user,
-                    service=service,
-                    queue_number=queue_number,
-                    priority_level=priority_level,
-                    position_in_queue=position,
-                    date=timezone.now().date()
-                )
+                # The slot taken by admission is given back if the ticket is not created
+                with transaction.atomic():
+                    queue_number = generate_queue_number(service)
+                    if queue_number is None:
+                        messages.warning(request, f'{service.name} has no queue slots left today. Please try again tomorrow.')
+                        return redirect('queues:take_queue')
+                    position = calculate_position(service, priority_level)
+                    
+                    queue = Queue.objects.create(
+                        user=request.user,
+                        service=service,
+                        queue_number=queue_number,
+                        priority_level=priority_level,
+                        position_in_queue=position,
+                        date=timezone.now().date()
+                    )
                 
                 messages.success(request, f'Queue number {queue.queue_number} assigned! Your position: #{position}')
                 return redirect('queues:queue_detail', queue_id=queue.id)
@@ -118,22 +136,51 @@ def take_queue_view(request):
 
 @login_required
 def queue_detail_view(request, queue_id):
-    queue = get_object_or_404(Queue, id=queue_id, user=request.user)
+    queue = get_object_or_404(Queue.objects.select_related('service__stats'), id=queue_id, user=request.user)
+    position = Queue.objects.live_ranks(queue.service_id, queue.date).get(queue.id)
     
     context = {
         'queue': queue,
+        'position': position,
+        'eta_minutes': estimate_wait_minutes(queue.service, position) if queue.status == 'waiting' else None,
     }
     return render(request, 'pages/queue/queue_detail.html', context)
 
+HISTORY_PAGE_SIZE = 25
+HISTORY_ORDERING = ('-created_at', '-id')
+
+def _queue_history_page(request):
+    """Live and archived tickets of the user, newest first"""
+    return keyset_paginate_merged(
+        [
+            Queue.objects.filter(user=request.user).select_related('service'),
+            QueueHistory.objects.filter(user=request.user).select_related('service'),
+        ],
+        HISTORY_ORDERING,
+        cursor=request.GET.get('after'),
+        per_page=HISTORY_PAGE_SIZE
+    )
+
 @login_required
 def queue_list_view(request):
-    user_queues = Queue.objects.filter(user=request.user).order_by('-created_at')
+    page = _queue_history_page(request)
     
     context = {
-        'queues': user_queues,
+        'queues': page.object_list,
+        'page': page,
+        'history_api_url': reverse('queues:queue_list_api'),
     }
     return render(request, 'pages/queue/queue_list.html', context)
 
+@login_required
+def queue_list_api(request):
+    """Next page of the user's queue history as rendered rows, for infinite scroll"""
+    page = _queue_history_page(request)
+    return JsonResponse({
+        'html': render_to_string('components/queue_history_rows.html', {'queues': page.object_list}, request=request),
+        'next_cursor': page.next_cursor,
+    })
+
 @login_required
 def cancel_queue_view(request, queue_id):
     queue = get_object_or_404(Queue, id=queue_id, user=request.user)
@@ -0,0 +1,167 @@
+"""
+Keyset pagination for long, append-heavy lists.
+Pages continue from the last row's ordering key instead of an OFFSET, so
+each page is one indexed range query no matter how deep the user scrolls.
+"""
+
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class KeysetPage:
+    """One page of rows plus the cursor that continues after its last row"""
+
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def _split(ordering):
+    return [(field.lstrip('-'), field.startswith('-')) for field in ordering]
+
+
+def _cursor_value(value):
+    # Full isoformat: DjangoJSONEncoder would cut datetimes to milliseconds
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(obj, ordering):
+    values = [getattr(obj, name) for name, _ in _split(ordering)]
+    return base64.urlsafe_b64encode(json.dumps(values, default=_cursor_value).encode()).decode()
+
+
+def _load_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def _to_python(model, ordering, values):
+    fields = _split(ordering)
+    if values is None or len(values) != len(fields):
+        return None
+    try:
+        return [
+            model._meta.get_field(name).to_python(value)
+            for (name, _), value in zip(fields, values)
+        ]
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+def decode_cursor(model, cursor, ordering):
+    """Ordering values stored in `cursor`, or None when it is missing or malformed"""
+    return _to_python(model, ordering, _load_cursor(cursor))
+
+
+def keyset_filter(ordering, values):
+    """Rows strictly after `values` in `ordering`, as a row-value comparison spelled out in Q objects"""
+    after = Q()
+    fields = _split(ordering)
+    for index, (name, descending) in enumerate(fields):
+        step = Q(**{f"{name}__{'lt' if descending else 'gt'}": values[index]})
+        for (earlier, _), value in zip(fields[:index], values):
+            step &= Q(**{earlier: value})
+        after |= step
+    return after
+
+
+def keyset_paginate(queryset, ordering, cursor=None, per_page=50):
+    """
+    Return the page of `queryset` that follows `cursor`
+
+    Args:
+        queryset: Rows to page through
+        ordering: Field names ending in a unique one, e.g. ('-created_at', '-id')
+        cursor: `next_cursor` of the previous page, or None for the first page
+        per_page: Rows per page
+
+    Returns:
+        KeysetPage
+    """
+    values = decode_cursor(queryset.model, cursor, ordering)
+    if values is not None:
+        queryset = queryset.filter(keyset_filter(ordering, values))
+
+    # One extra row tells whether another page follows
+    rows = list(queryset.order_by(*ordering)[:per_page + 1])
+    next_cursor = encode_cursor(rows[per_page - 1], ordering) if len(rows) > per_page else None
+    return KeysetPage(rows[:per_page], next_cursor)
+
+
+
+def _merged_filter(ordering, values, source, cursor_source):
+    """Rows of queryset `source` after the cursor row taken from queryset `cursor_source`"""
+    if source == cursor_source:
+        return keyset_filter(ordering, values)
+    # The last field only orders rows within one queryset; across querysets
+    # ties on the other fields go to the one listed first
+    after = keyset_filter(ordering[:-1], values[:-1])
+    if source > cursor_source:
+        after |= Q(**{name: value for (name, _), value in zip(_split(ordering[:-1]), values)})
+    return after
+
+
+def keyset_paginate_merged(querysets, ordering, cursor=None, per_page=50):
+    """
+    Return the page that follows `cursor` of several querysets read as one list
+
+    Each queryset is read with its own indexed range query of at most
+    `per_page + 1` rows and the results are merged in Python. Rows that tie
+    on every field but the last come in the order the querysets are given.
+
+    Args:
+        querysets: Rows to page through, e.g. live and archived tickets
+        ordering: Field names ending in one unique within each queryset
+        cursor: `next_cursor` of the previous page, or None for the first page
+        per_page: Rows per page
+
+    Returns:
+        KeysetPage
+    """
+    # The cursor holds the index of the queryset its row came from, then
+    # that row's ordering values
+    stored = _load_cursor(cursor)
+    cursor_source, values = None, None
+    if stored and isinstance(stored[0], int) and 0 <= stored[0] < len(querysets):
+        cursor_source = stored[0]
+        values = _to_python(querysets[cursor_source].model, ordering, stored[1:])
+
+    rows = []
+    for source, queryset in enumerate(querysets):
+        if values is not None:
+            queryset = queryset.filter(_merged_filter(ordering, values, source, cursor_source))
+        rows.extend((source, row) for row in queryset.order_by(*ordering)[:per_page + 1])
+
+    # Stable sorts from the least significant key up
+    fields = _split(ordering)
+    rows.sort(key=lambda item: getattr(item[1], fields[-1][0]), reverse=fields[-1][1])
+    rows.sort(key=lambda item: item[0])
+    for name, descending in reversed(fields[:-1]):
+        rows.sort(key=lambda item: getattr(item[1], name), reverse=descending)
+
+    next_cursor = None
+    if len(rows) > per_page:
+        source, last = rows[per_page - 1]
+        values = [source] + [getattr(last, name) for name, _ in fields]
+        next_cursor = base64.urlsafe_b64encode(json.dumps(values, default=_cursor_value).encode()).decode()
+    return KeysetPage([row for _, row in rows[:per_page]], next_cursor)
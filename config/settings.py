@@ -70,6 +70,11 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', ''),
         'PORT': os.getenv('DB_PORT', '5432'),
+        # File-backed test database so threaded tests see real SQLite locking;
+        # the in-memory default uses shared-cache table locks instead
+        'TEST': {
+            'NAME': os.path.join(BASE_DIR, 'test_db.sqlite3'),
+        },
     }
 }
 
@@ -78,6 +83,15 @@ import dj_database_url
 if os.getenv('DATABASE_URL'):
     DATABASES['default'] = dj_database_url.config(default=os.getenv('DATABASE_URL'), conn_max_age=600)
 
+# How streaming views learn about queue changes: 'local' (single process)
+# or 'postgres' (LISTEN/NOTIFY across all worker processes)
+QUEUE_CHANGE_NOTIFIER = os.getenv('QUEUE_CHANGE_NOTIFIER', 'local')
+
+# Walk-in streams a worker process keeps open at once. Each holds one of
+# gunicorn's threads (16 per worker), so keep this well below that; boards
+# beyond the limit fall back to polling the ETag API.
+WALKIN_STREAM_MAX_CONNECTIONS = int(os.getenv('WALKIN_STREAM_MAX_CONNECTIONS', '4'))
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},